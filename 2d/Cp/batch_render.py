@@ -0,0 +1,275 @@
+#non-interactive rendering of the combined XFLR5 / experiment Cp plots for a whole sweep
+
+import glob
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from build_manifest import MANIFEST_NAME, BuildManifest, content_key, file_digest
+from cp_store import CpStore, is_cp_store
+from data_cache import cached_frame
+from output_profiles import get_profile, markevery, save_figure
+from polar_store import match_alphas
+from xflr5_parser import read_xflr5_frame
+
+# Plot styles of the two interactive scripts
+STYLES = {
+    # cp_plotter.py: lines with markers, viscous XFLR5 Cp
+    'plotter': {
+        'figsize': (10, 6),
+        'xflr5_column': 'Cpv',
+        'upper': dict(marker='o', linestyle='-', color='black', label='Experimental Data Upper'),
+        'lower': dict(marker='o', linestyle='-', color='red', label='Experimental Data Lower'),
+        'xflr5': dict(marker='^', linestyle='-', color='blue', label='XFLR5 Data'),
+        'xlabel': 'x/c [-]',
+        'ylabel': '$C_p$ [-]',
+        'title': None,
+        'filename': 'combined_cp_aoa={alpha}',
+    },
+    # cp_grapher.py: dashed inviscid XFLR5 Cp, experiment as scatter
+    'grapher': {
+        'figsize': (10, 6),
+        'xflr5_column': 'Cpi',
+        'upper': dict(marker='o', linestyle='', color='b', label='Experiment Cp Upper'),
+        'lower': dict(marker='o', linestyle='', color='r', label='Experiment Cp Lower'),
+        'xflr5': dict(linestyle='--', label='XFLR5 Cp'),
+        'xlabel': 'x/c',
+        'ylabel': 'Cp',
+        'title': 'Pressure Coefficient Distribution at AoA = {alpha}',
+        'filename': 'Cp_Distribution_AoA_{alpha}',
+    },
+}
+
+
+def _files_by_alpha(folder, pattern):
+    files = {}
+    for path in glob.glob(os.path.join(folder, pattern)):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        try:
+            files[float(stem)] = path
+        except ValueError:
+            continue  # Not a per-AoA result file
+    return files
+
+
+def available_aoas(xflr5_folder, experiment_folder, tolerance=0.05):
+    """
+    Lists the AoAs that have both an XFLR5 file and an experimental result.
+
+    Parameters:
+        xflr5_folder (str): Folder with the XFLR5 '{alpha}.txt' files.
+        experiment_folder (str): Cp store written by cp_getter.py, or a
+            folder with the experimental '{alpha}.csv' files.
+        tolerance (float): Largest AoA difference that still pairs two files.
+
+    Returns:
+        list: (alpha, xflr5_path, experiment) tuples sorted by XFLR5 alpha,
+        where experiment is the CSV path or, for a store, the Cp DataFrame of
+        the latest run at that alpha.
+    """
+    xflr5_files = _files_by_alpha(xflr5_folder, "*.txt")
+    if is_cp_store(experiment_folder):
+        experiment_files = CpStore(experiment_folder).latest_frames()
+    else:
+        experiment_files = _files_by_alpha(experiment_folder, "*.csv")
+    pairs = match_alphas(xflr5_files, experiment_files, tolerance)
+    return [(alpha, xflr5_files[alpha], experiment_files[exp_alpha]) for alpha, exp_alpha in pairs]
+
+
+class CpFigure:
+    """
+    One Agg figure that is re-used for every AoA by swapping the line data.
+    """
+
+    def __init__(self, style='plotter'):
+        self.style = STYLES[style]
+        self.figure = Figure(figsize=self.style['figsize'])
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+
+        self.upper, = self.ax.plot([], [], **self.style['upper'])
+        self.lower, = self.ax.plot([], [], **self.style['lower'])
+        self.xflr5, = self.ax.plot([], [], **self.style['xflr5'])
+
+        self.ax.set_xlabel(self.style['xlabel'])
+        self.ax.set_ylabel(self.style['ylabel'])
+        self.ax.grid(True)
+        self.ax.legend()
+
+    def update(self, alpha, experiment_data, xflr5_data, profile=None):
+        upper = experiment_data[experiment_data['Surface'] == 'Upper']
+        lower = experiment_data[experiment_data['Surface'] == 'Lower']
+        self.upper.set_data(upper['x/c'], upper['Cp'])
+        self.lower.set_data(lower['x/c'], lower['Cp'])
+        self.xflr5.set_data(xflr5_data['x'], xflr5_data[self.style['xflr5_column']])
+        # Thin out the markers of long lines for small outputs
+        for line in (self.upper, self.lower, self.xflr5):
+            line.set_markevery(markevery(len(line.get_xdata()), profile))
+
+        if self.style['title']:
+            self.ax.set_title(self.style['title'].format(alpha=alpha))
+
+        # Rescale to the new data and keep the Cp axis inverted
+        self.ax.relim()
+        self.ax.autoscale_view()
+        bottom, top = self.ax.get_ylim()
+        if bottom < top:
+            self.ax.set_ylim(top, bottom)
+
+    def save(self, folder, stem, profile=None):
+        return save_figure(self.figure, folder, stem, profile)
+
+
+def _load_job(xflr5_path, experiment):
+    xflr5_data = cached_frame(xflr5_path, read_xflr5_frame, 'xflr5')
+    experiment_data = experiment if isinstance(experiment, pd.DataFrame) else pd.read_csv(experiment)
+    return xflr5_data, experiment_data
+
+
+def _render_chunk(jobs, output_folder, style, profile):
+    # Every worker builds its figure once and re-uses it for all of its AoAs
+    figure = CpFigure(style)
+    saved = []
+    for alpha, xflr5_path, experiment in jobs:
+        xflr5_data, experiment_data = _load_job(xflr5_path, experiment)
+        figure.update(alpha, experiment_data, xflr5_data, profile)
+        saved.append(figure.save(output_folder, STYLES[style]['filename'].format(alpha=alpha), profile))
+    return saved
+
+
+def _job_key(job, style, profile):
+    # A plot depends on the XFLR5 file, the measured Cp, the plot style and the output profile
+    alpha, xflr5_path, experiment = job
+    source = experiment if isinstance(experiment, pd.DataFrame) else file_digest(experiment)
+    return content_key(alpha, file_digest(xflr5_path), source, style, STYLES[style], profile)
+
+
+def _resolve_profile(profile, dpi):
+    # An explicit dpi overrides the one of the profile
+    profile = get_profile(profile)
+    return dict(profile, dpi=dpi, raster_dpi=dpi) if dpi else profile
+
+
+def render_batch(xflr5_folder, experiment_folder, output_folder, style='plotter', dpi=None, workers=None,
+                 tolerance=0.05, profile=None, force=False):
+    """
+    Renders the combined Cp plot of every available AoA without opening a window.
+
+    A manifest in the output folder records the content hash of the inputs
+    and settings of every plot; plots whose inputs did not change since the
+    last run are skipped unless force is set.
+
+    Parameters:
+        xflr5_folder (str): Folder with the XFLR5 Cp files.
+        experiment_folder (str): Cp store or folder with the experimental Cp files.
+        output_folder (str): Folder the PNGs are written to.
+        style (str): 'plotter' or 'grapher', see STYLES.
+        dpi (int): Overrides the dpi of the output profile.
+        workers (int): Number of rendering processes, defaults to the number of CPUs.
+        tolerance (float): Largest AoA difference that still pairs two files.
+        profile (str): Output profile (preview, report, print), see output_profiles.
+        force (bool): Render every plot, also the up-to-date ones.
+
+    Returns:
+        list: Paths of the figures saved in this run.
+    """
+    profile = _resolve_profile(profile, dpi)
+    os.makedirs(output_folder, exist_ok=True)
+    manifest = BuildManifest(os.path.join(output_folder, MANIFEST_NAME))
+
+    jobs, keys = [], []
+    available = available_aoas(xflr5_folder, experiment_folder, tolerance)
+    for job in available:
+        key = _job_key(job, style, profile)
+        if force or not manifest.is_fresh(STYLES[style]['filename'].format(alpha=job[0]), key):
+            jobs.append(job)
+            keys.append(key)
+    if len(jobs) < len(available):
+        print(f"{len(available) - len(jobs)} of {len(available)} plots are up to date")
+    if not jobs:
+        return []
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        chunks = [(jobs, keys)]
+        results = [_render_chunk(jobs, output_folder, style, profile)]
+    else:
+        # Interleave the AoAs so every worker gets a similar share of the sweep
+        chunks = [(jobs[i::workers], keys[i::workers]) for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_chunk, chunk, output_folder, style, profile) for chunk, _ in chunks]
+            results = [future.result() for future in futures]
+
+    saved = []
+    for (chunk, chunk_keys), paths in zip(chunks, results):
+        for job, key, path in zip(chunk, chunk_keys, paths):
+            manifest.record(STYLES[style]['filename'].format(alpha=job[0]), key, path)
+            saved.append(path)
+    manifest.save()
+    return sorted(saved)
+
+
+def render_contact_sheet(xflr5_folder, experiment_folder, output_folder, style='plotter', profile='preview',
+                         tolerance=0.05, columns=None, force=False):
+    """
+    Tiles the Cp plots of all available AoAs into one figure.
+
+    Parameters:
+        xflr5_folder (str): Folder with the XFLR5 Cp files.
+        experiment_folder (str): Cp store or folder with the experimental Cp files.
+        output_folder (str): Folder the sheet is written to.
+        style (str): 'plotter' or 'grapher', see STYLES.
+        profile (str): Output profile, preview by default.
+        tolerance (float): Largest AoA difference that still pairs two files.
+        columns (int): Tiles per row, defaults to a near-square grid.
+        force (bool): Render the sheet even when none of its inputs changed.
+
+    Returns:
+        str: Path of the sheet, None when no AoA is available.
+    """
+    jobs = available_aoas(xflr5_folder, experiment_folder, tolerance)
+    if not jobs:
+        return None
+    os.makedirs(output_folder, exist_ok=True)
+
+    # The sheet is stale as soon as one of its tiles is
+    manifest = BuildManifest(os.path.join(output_folder, MANIFEST_NAME))
+    stem = f"contact_sheet_{style}"
+    key = content_key([_job_key(job, style, profile) for job in jobs], columns)
+    if not force and manifest.is_fresh(stem, key):
+        print(f"{stem} is up to date")
+        return os.path.join(manifest.folder, manifest.get(stem)['path'])
+
+    settings = STYLES[style]
+    columns = columns or math.ceil(math.sqrt(len(jobs)))
+    rows = math.ceil(len(jobs) / columns)
+
+    figure = Figure(figsize=(3 * columns, 2.4 * rows))
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(rows, columns, sharex=True, squeeze=False).ravel()
+    for ax, (alpha, xflr5_path, experiment) in zip(axes, jobs):
+        xflr5_data, experiment_data = _load_job(xflr5_path, experiment)
+        for surface in ('Upper', 'Lower'):
+            data = experiment_data[experiment_data['Surface'] == surface]
+            line_style = dict(settings[surface.lower()], markersize=3, label=None)
+            ax.plot(data['x/c'], data['Cp'], markevery=markevery(len(data), profile), **line_style)
+        line_style = dict(settings['xflr5'], markersize=3, label=None)
+        ax.plot(xflr5_data['x'], xflr5_data[settings['xflr5_column']],
+                markevery=markevery(len(xflr5_data), profile), **line_style)
+        ax.set_title(f"α = {alpha}°", fontsize=9)
+        ax.invert_yaxis()
+        ax.tick_params(labelsize=7)
+        ax.grid(True)
+    # Hide the unused tiles of the last row
+    for ax in axes[len(jobs):]:
+        ax.set_visible(False)
+
+    figure.tight_layout()
+    path = save_figure(figure, output_folder, stem, profile)
+    manifest.record(stem, key, path)
+    manifest.save()
+    return path
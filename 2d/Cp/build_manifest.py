@@ -0,0 +1,115 @@
+#records which inputs every derived output was built from, so later runs only rebuild stale outputs
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bump this when the key recipe changes so every output is rebuilt once
+MANIFEST_VERSION = 1
+MANIFEST_NAME = ".build_manifest.json"
+
+# (abspath, size, mtime_ns) -> sha1, so unchanged files are hashed once per process
+_file_digests = {}
+
+
+def file_digest(path):
+    """
+    SHA-1 of the contents of a file.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (path, stat.st_size, stat.st_mtime_ns)
+    if stamp not in _file_digests:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        _file_digests[stamp] = digest.hexdigest()
+    return _file_digests[stamp]
+
+
+def _update(digest, part):
+    if isinstance(part, pd.DataFrame):
+        digest.update(repr(list(part.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    elif isinstance(part, np.ndarray):
+        digest.update(f"{part.dtype}{part.shape}".encode())
+        digest.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, bytes):
+        digest.update(part)
+    elif isinstance(part, str):
+        digest.update(part.encode())
+    else:
+        # Numbers, dicts of settings, lists, tuples
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+    # Separator, so ('ab', 'c') and ('a', 'bc') give different keys
+    digest.update(b'\0')
+
+
+def content_key(*parts):
+    """
+    Combines the inputs and parameters of an output into one key.
+
+    Parameters:
+        *parts: Strings (e.g. file_digest results), arrays, DataFrames,
+            bytes or JSON-serialisable settings.
+
+    Returns:
+        str: SHA-1 hex digest.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    JSON file next to a set of outputs with the key each output was built from.
+
+    Outputs are named by a stable id (e.g. the file name without extension);
+    the recorded path tells where the output was written. An output is fresh
+    when its recorded key matches and the file still exists.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.folder = os.path.dirname(os.path.abspath(path))
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as file:
+                    manifest = json.load(file)
+                if manifest.get('version') == MANIFEST_VERSION:
+                    self.entries = manifest['outputs']
+            except (OSError, ValueError):
+                pass  # A damaged manifest only means a full rebuild
+
+    def get(self, output):
+        return self.entries.get(output)
+
+    def is_fresh(self, output, key):
+        entry = self.entries.get(output)
+        if entry is None or entry['key'] != key:
+            return False
+        path = entry.get('path')
+        return path is None or os.path.exists(os.path.join(self.folder, path))
+
+    def record(self, output, key, path=None, **extra):
+        """
+        Stores the key of a freshly built output; path is stored relative to the manifest.
+        """
+        entry = dict(extra, key=key)
+        if path is not None:
+            entry['path'] = os.path.relpath(os.path.abspath(path), self.folder)
+        self.entries[output] = entry
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, 'w') as file:
+            json.dump({'version': MANIFEST_VERSION, 'outputs': self.entries}, file, indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
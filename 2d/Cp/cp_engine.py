@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from data_cache import cached_frame
+from tap_layout import SURFACE_GROUPS
+
+# Column layout of raw_2D.txt (after skipping the two header rows, header=None)
+# Run_nr, Time, Alpha, Delta_Pb, P_bar, T, rpm, rho, P001, P002, ...
+RUN_COLUMN = 0
+ALPHA_COLUMN = 2
+DELTA_PB_COLUMN = 3
+
+# Rows per block of the chunked reader: about 10 MB of float32 pressures for
+# the 113 tap columns, so the peak memory does not grow with the file size
+CHUNK_ROWS = 20000
+
+# Calibration polynomial of the dynamic pressure against Delta_Pb
+Q_COEFFICIENTS = (0.211, 1.9284, 1.8793e-4)
+
+
+def dynamic_pressure(delta_pb):
+    """
+    Evaluates the dynamic-pressure calibration polynomial for one or many runs.
+
+    Parameters:
+        delta_pb (float or array): Delta_Pb reading(s) in Pa.
+
+    Returns:
+        float or array: Dynamic pressure(s) in Pa.
+    """
+    delta_pb = np.asarray(delta_pb, dtype=float)
+    c0, c1, c2 = Q_COEFFICIENTS
+    return c0 + c1 * delta_pb + c2 * delta_pb**2
+
+
+def read_raw_file(file_path):
+    # Since it's space-separated and has two header rows, split on whitespace and skiprows=2
+    return pd.read_csv(file_path, sep=r'\s+', skiprows=2, header=None)
+
+
+def load_raw_values(file_path):
+    """
+    Loads raw_2D.txt (through the binary cache) as a numeric run matrix.
+
+    Returns:
+        array: (runs x columns) values, the non-numeric Time column as NaN.
+    """
+    raw_data = cached_frame(file_path, read_raw_file, 'raw')
+    return raw_data.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def read_raw_chunks(file_path, layout, chunk_rows=CHUNK_ROWS):
+    """
+    Streams raw_2D.txt in blocks of chunk_rows runs.
+
+    Only the run number, alpha, Delta_Pb and the pressure columns of the
+    layout are parsed; the Time column and unused taps are dropped at parse
+    time. The readings are logged with two decimals, so float32 holds them
+    exactly enough and halves the memory of every block.
+
+    Parameters:
+        file_path (str): Path to raw_2D.txt.
+        layout (TapLayout): Tap groups, decides which pressure columns are read.
+        chunk_rows (int): Runs per block.
+
+    Yields:
+        array: float32 (runs x columns) block in the raw column numbering,
+        the columns that were not read as NaN, so reduce_cp works on it.
+    """
+    columns = sorted({RUN_COLUMN, ALPHA_COLUMN, DELTA_PB_COLUMN, *layout.columns.tolist()})
+    n_columns = columns[-1] + 1
+    reader = pd.read_csv(file_path, sep=r'\s+', skiprows=2, header=None, usecols=columns,
+                         dtype=np.float32, chunksize=chunk_rows)
+    for chunk in reader:
+        block = np.full((len(chunk), n_columns), np.nan, dtype=np.float32)
+        block[:, chunk.columns.to_numpy()] = chunk.to_numpy()
+        yield block
+
+
+def reduce_cp_chunks(file_path, layout, chunk_rows=CHUNK_ROWS):
+    """
+    Reduces raw_2D.txt to Cp one block of runs at a time, see read_raw_chunks.
+
+    Yields:
+        dict: reduce_cp output of every block.
+    """
+    for block in read_raw_chunks(file_path, layout, chunk_rows):
+        yield reduce_cp(block, layout)
+
+
+def reduce_cp(raw_values, layout):
+    """
+    Computes Cp for every run of the raw table in one pass.
+
+    All tap groups of the layout are pulled from the run matrix with a single
+    gather; the airfoil surfaces are reduced to Cp, the other groups (wake
+    rakes, pitot tube) are passed on as pressures.
+
+    Parameters:
+        raw_values (array): Numeric raw_2D.txt table (runs x columns).
+        layout (TapLayout): Tap groups, see tap_layout.load_tap_layout.
+
+    Returns:
+        dict: 'run', 'alpha', 'q' (per run), 'cp' (runs x airfoil taps), 'x_c', 'y_c',
+        'labels', the boolean tap masks 'upper' and 'lower', and 'pressures'
+        (group name -> runs x taps in Pa) for every group.
+    """
+    raw_values = np.asarray(raw_values, dtype=float)
+    if raw_values.ndim == 1:
+        raw_values = raw_values[np.newaxis, :]
+
+    alpha = raw_values[:, ALPHA_COLUMN]
+    q = dynamic_pressure(raw_values[:, DELTA_PB_COLUMN])
+    pressures = layout.gather(raw_values)
+
+    # Cp = PXXX / dynamic pressure, broadcast over all taps of each run
+    surfaces = [name for name in SURFACE_GROUPS if name in layout]
+    cp = np.concatenate([pressures[name] for name in surfaces], axis=1) / q[:, np.newaxis]
+
+    labels = np.concatenate([layout[name]['labels'] for name in surfaces])
+    x_c = np.concatenate([layout[name].get('x', np.full(len(layout[name]['labels']), np.nan)) for name in surfaces])
+    y_c = np.concatenate([layout[name].get('y', np.full(len(layout[name]['labels']), np.nan)) for name in surfaces])
+
+    # Taps without a known x/c are dropped from both surfaces
+    valid = ~np.isnan(x_c)
+    if not valid.all():
+        print(f"Warning: Missing x/c locations for points: {labels[~valid].tolist()}")
+
+    masks = {}
+    start = 0
+    for name in SURFACE_GROUPS:
+        mask = np.zeros(len(labels), dtype=bool)
+        if name in layout:
+            mask[start:start + len(layout[name]['labels'])] = True
+            start += len(layout[name]['labels'])
+        masks[name] = mask & valid
+
+    return {
+        'run': raw_values[:, RUN_COLUMN].astype(int),
+        'alpha': alpha,
+        'q': q,
+        'cp': cp,
+        'x_c': x_c,
+        'y_c': y_c,
+        'labels': labels,
+        'upper': masks['upper'],
+        'lower': masks['lower'],
+        'pressures': pressures,
+    }
+
+
+def surface(result, run_index, name):
+    """
+    Returns (labels, x/c, Cp) of one surface of one run as views on the engine output.
+    """
+    mask = result[name]
+    return result['labels'][mask], result['x_c'][mask], result['cp'][run_index, mask]
+
+
+def cp_frame(result, run_index):
+    """
+    Builds the (Point, x/c, Cp, Surface) table of one run, upper surface first.
+    """
+    label_upper, x_c_upper, cp_upper = surface(result, run_index, 'upper')
+    label_lower, x_c_lower, cp_lower = surface(result, run_index, 'lower')
+    return pd.DataFrame({
+        'Point': np.concatenate([label_upper, label_lower]),
+        'x/c': np.concatenate([x_c_upper, x_c_lower]),
+        'Cp': np.concatenate([cp_upper, cp_lower]),
+        'Surface': ['Upper'] * len(x_c_upper) + ['Lower'] * len(x_c_lower)
+    })
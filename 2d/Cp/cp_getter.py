@@ -1,199 +1,246 @@
-﻿import pandas as pd
-import matplotlib.pyplot as plt
-
-# File paths (update these paths according to your file locations)
-raw_txt_path = r'2d\Cp\raw_2D.txt'  # Updated to .txt
-coordinates_excel_path = r'2d\Cp\SLT_practical_coordinates.xlsx'
-
-# Load the raw TXT data
-# Since it's space-separated and has two header rows, use delim_whitespace=True and skiprows=2
-try:
-    raw_data = pd.read_csv(raw_txt_path, delim_whitespace=True, skiprows=2, header=None)
-except Exception as e:
-    print(f"Error reading raw_2D.txt: {e}")
-    exit(1)
-
-# Inspect the first few rows to ensure correct parsing
-print("First few rows of raw_data:")
-print(raw_data.head())
-
-# Load the coordinates from Excel
-try:
-    coordinates = pd.read_excel(coordinates_excel_path, sheet_name=0)
-except Exception as e:
-    print(f"Error reading SLT_practical_coordinates.xlsx: {e}")
-    exit(1)
-
-# Create a dictionary to map PXXX to x/c locations
-# Assuming the first column has PXXX labels and the second column has x/c percentages
-point_dict = dict(zip(coordinates.iloc[:, 0].astype(str), coordinates.iloc[:, 1]))
-# Ensure that PXXX keys are strings with leading zeros (e.g., P001)
-point_dict = {str(k).zfill(4): v for k, v in point_dict.items()}
+﻿import argparse
+import os
+import sys
 
-# Function to plot Cp for a specific row and export CSV
-def plot_cp(row_number, show = True ):
-    try:
-        # Adjust for zero-based indexing
-        # Since we skipped first two rows and header is None, data starts at index 0
-        # If row_number starts at 3, then raw_data index is row_number - 3
-        row_index = row_number - 3
-        if row_index < 0 or row_index >= len(raw_data):
-            print(f"Row number out of range. Please enter a row number between 3 and {len(raw_data) + 2}.")
-            return
-        row = raw_data.iloc[row_index]
-    except IndexError:
-        print("Row number out of range.")
-        return
+import pandas as pd
 
-    # Assuming alpha is in the 3rd column (0-based index 2)
-    try:
-        alpha = row.iloc[2]
-    except IndexError:
-        print(f"Alpha value not found in row {row_number}. Please check the data structure.")
-        return
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from build_manifest import MANIFEST_NAME, BuildManifest, content_key
+from cp_engine import CHUNK_ROWS, cp_frame, read_raw_file, reduce_cp, reduce_cp_chunks, surface
+from cp_store import CpStore
+from data_cache import cached_frame
+from instrumentation import span
+from tap_layout import layout_from_coordinates
+
+# File paths next to this script, so they resolve on every OS and from any working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+raw_txt_path = os.path.join(HERE, 'raw_2D.txt')
+coordinates_excel_path = os.path.join(HERE, 'SLT_practical_coordinates.xlsx')
+# One CSV per plotted row, read by cp_grapher.py and cp_plotter.py
+real_results_path = os.path.join(HERE, 'real_results')
+# All runs of the 'all' mode, read by cp_grapher.py and cp_plotter.py
+cp_store_path = os.path.join(HERE, 'cp_store')
+
+
+def read_coordinates_file(file_path):
+    return pd.read_excel(file_path, sheet_name=0)
 
-    # Assuming Delta_Pb is in the 4th column (0-based index 3)
+
+def load_cp_runs(raw_path=raw_txt_path, coordinates_path=coordinates_excel_path):
+    """
+    Loads the raw tunnel log and the tap coordinates and reduces every run to Cp.
+
+    Returns:
+        dict: Output of cp_engine.reduce_cp, which plot_cp and the 'all' mode view.
+    """
+    # Load the raw TXT data (parsed once, later runs read the binary cache)
+    try:
+        with span('cp_getter.load_raw') as stage:
+            raw_data = cached_frame(raw_path, read_raw_file, 'raw')
+            stage.count = len(raw_data)
+    except Exception as e:
+        print(f"Error reading raw_2D.txt: {e}")
+        exit(1)
+
+    # Inspect the first few rows to ensure correct parsing
+    print("First few rows of raw_data:")
+    print(raw_data.head())
+
+    # Load the coordinates from Excel
     try:
-        delta_Pb = row.iloc[3]
-    except IndexError:
-        print(f"Delta_Pb value not found in row {row_number}. Please check the data structure.")
+        with span('cp_getter.load_coordinates', 1):
+            coordinates = cached_frame(coordinates_path, read_coordinates_file, 'coordinates')
+    except Exception as e:
+        print(f"Error reading SLT_practical_coordinates.xlsx: {e}")
+        exit(1)
+
+    # Map every PXXX column to its tap group (upper, lower, wake rakes, pitot tube)
+    layout = layout_from_coordinates(coordinates)
+
+    # Reduce every run to Cp in one pass
+    with span('cp_getter.reduce', len(raw_data)):
+        raw_values = raw_data.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        return reduce_cp(raw_values, layout)
+
+# Function to plot Cp for a specific row and export CSV
+def plot_cp(cp_runs, row_number, show = True, results_folder=real_results_path):
+    # Since we skipped first two rows and header is None, data starts at index 0
+    # If row_number starts at 3, then the run index is row_number - 3
+    n_rows = len(cp_runs['alpha'])
+    row_index = row_number - 3
+    if row_index < 0 or row_index >= n_rows:
+        print(f"Row number out of range. Please enter a row number between 3 and {n_rows + 2}.")
         return
 
-    # Calculate dynamic pressure
-    dynamic_pressure = 0.211 + 1.9284 * delta_Pb + 1.8793e-4 * (delta_Pb)**2
+    alpha = cp_runs['alpha'][row_index]
+    dynamic_pressure = cp_runs['q'][row_index]
 
     print(f"Plotting Cp for Row {row_number} with alpha = {alpha} degrees "
           f"and dynamic pressure = {dynamic_pressure:.3f} Pa.")
 
-    # Extract P001 to P049
-    # The user mentioned that points begin at the 9th column
-    # Since Python uses 0-based indexing, 9th column is index 8
-    try:
-        p_values = row.iloc[8:8+49].values  # P001 to P049
-    except IndexError:
-        print(f"Pressure values not found in row {row_number}. Please check the data structure.")
-        return
+    # Split the data (P001-P025 = upper, P026-P049 = lower)
+    label_first, x_c_first, cp_first = surface(cp_runs, row_index, 'upper')
+    label_second, x_c_second, cp_second = surface(cp_runs, row_index, 'lower')
 
-    # Check if we have exactly 49 points
-    if len(p_values) < 49:
-        print(f"Expected 49 pressure values, but found {len(p_values)} in row {row_number}.")
-        # Optionally, handle missing values
-        p_values = p_values.tolist() + [0]*(49 - len(p_values))  # Fill missing with 0
-    elif len(p_values) > 49:
-        p_values = p_values[:49]  # Truncate extra values
-
-    # Compute Cp
-    cp = p_values / dynamic_pressure  # Cp = PXXX / dynamic pressure
-
-    # Get corresponding x/c locations
-    p_labels = [f'P{str(i).zfill(3)}' for i in range(1, 50)]  # P001 to P049
-    x_c = [point_dict.get(p, None) for p in p_labels]
-
-    # Check for any missing x/c values
-    if None in x_c:
-        missing = [p for p, xval in zip(p_labels, x_c) if xval is None]
-        print(f"Warning: Missing x/c locations for points: {missing}")
-        # Remove points with missing x/c
-        new_cp, new_x_c, new_labels = [], [], []
-        for cval, xval, lab in zip(cp, x_c, p_labels):
-            if xval is not None:
-                new_cp.append(cval)
-                new_x_c.append(xval)
-                new_labels.append(lab)
-        cp = new_cp
-        x_c = new_x_c
-        p_labels = new_labels
-
-    # Normalize x/c from 0-100 to 0-1
-    x_c_normalized = [xc / 100 for xc in x_c]
-
-    # Define split index for P025 and P026
-    # P025 is index 24 (0-based), P026 is index 25
-    split_index = 25  # Start of P026
-
-    # Split the data (first 25 = upper, last 24 = lower)
-    x_c_first  = x_c_normalized[:split_index]  # P001 to P025
-    cp_first   = cp[:split_index]
-    label_first= p_labels[:split_index]
-
-    x_c_second  = x_c_normalized[split_index:]  # P026 to P049
-    cp_second   = cp[split_index:]
-    label_second= p_labels[split_index:]
-
-    # Plotting
-    plt.figure(figsize=(8, 5))  # Adjusted figure size
-
-    # Plot first segment (Upper Surface: P001-P025)
-    plt.plot(x_c_first, cp_first, color='blue', label=f'Upper Surface (α={alpha}°)')
-    plt.scatter(x_c_first, cp_first, color='blue')
-
-    # Plot second segment (Lower Surface: P026-P049)
-    plt.plot(x_c_second, cp_second, color='red', label=f'Lower Surface (α={alpha}°)')
-    plt.scatter(x_c_second, cp_second, color='red')
-
-    # Invert y-axis for Cp
-    plt.gca().invert_yaxis()
-
-    # Set axis labels with units
-    plt.xlabel('x/c [-]')
-    plt.ylabel('$C_p$ [-]')
-
-    # Set x-axis limits
-    plt.xlim(-0.05, 1.05)
-
-    # Add grid
-    plt.grid(True)
-
-    # Add legend
-    # Show the plot
     if show:
+        # Only needed for interactive plots, the 'all' export runs without it
+        import matplotlib.pyplot as plt
+
+        # Plotting
+        plt.figure(figsize=(8, 5))  # Adjusted figure size
+
+        # Plot first segment (Upper Surface: P001-P025)
+        plt.plot(x_c_first, cp_first, color='blue', label=f'Upper Surface (α={alpha}°)')
+        plt.scatter(x_c_first, cp_first, color='blue')
+
+        # Plot second segment (Lower Surface: P026-P049)
+        plt.plot(x_c_second, cp_second, color='red', label=f'Lower Surface (α={alpha}°)')
+        plt.scatter(x_c_second, cp_second, color='red')
+
+        # Invert y-axis for Cp
+        plt.gca().invert_yaxis()
+
+        # Set axis labels with units
+        plt.xlabel('x/c [-]')
+        plt.ylabel('$C_p$ [-]')
+
+        # Set x-axis limits
+        plt.xlim(-0.05, 1.05)
+
+        # Add grid
+        plt.grid(True)
+
+        # Show the plot
         plt.show()
-    
-    
 
     # === CSV Export Added ===
     # Build DataFrame for upper and lower surfaces
-    df_upper = pd.DataFrame({
-        'Point': label_first,
-        'x/c': x_c_first,
-        'Cp': cp_first,
-        'Surface': ['Upper'] * len(x_c_first)
-    })
-    df_lower = pd.DataFrame({
-        'Point': label_second,
-        'x/c': x_c_second,
-        'Cp': cp_second,
-        'Surface': ['Lower'] * len(x_c_second)
-    })
-
-    # Combine and export
-    df_out = pd.concat([df_upper, df_lower], ignore_index=True)
    # csv_filename = f"CP_distribution_row_{row_number}.csv"
-    csv_filename = f"2d\\Cp\\real_results\\{alpha}.csv"
-    df_out.to_csv(csv_filename, index=False)
+    with span('cp_getter.export_csv', 1):
+        df_out = cp_frame(cp_runs, row_index)
+        csv_filename = os.path.join(results_folder, f"{alpha}.csv")
+        df_out.to_csv(csv_filename, index=False)
     print(f"Exported CSV of (x/c, Cp) to: {csv_filename}")
 
-# Main Execution
-def main():
-    print(f"Total number of data rows: {len(raw_data)} (corresponding to rows 3 to {len(raw_data) + 2})")
+
+def _runs_key(cp_runs, n_rows):
+    # Key of the first n_rows runs together with the tap layout they were reduced with
+    return content_key(cp_runs['run'][:n_rows], cp_runs['alpha'][:n_rows], cp_runs['q'][:n_rows],
+                       cp_runs['cp'][:n_rows], cp_runs['labels'], cp_runs['x_c'], cp_runs['y_c'],
+                       cp_runs['upper'], cp_runs['lower'])
+
+
+def export_all(cp_runs, store_path=cp_store_path, force=False):
+    # One bulk write of every run; repeated alphas are kept as separate runs.
+    # The manifest in the store remembers which runs were written, so an
+    # unchanged raw file is skipped and a grown one only appends its new rows.
+    store = CpStore(store_path)
+    manifest = BuildManifest(os.path.join(store_path, MANIFEST_NAME))
+    n_rows = len(cp_runs['alpha'])
+    key = _runs_key(cp_runs, n_rows)
+    written = manifest.get('store')
+
+    with span('cp_getter.export_store', n_rows) as stage:
+        if not force and written and store.parts() and written['key'] == key:
+            stage.count = 0
+            print(f"Cp store {store_path} is up to date ({n_rows} rows).")
+            return
+        if (not force and written and store.parts() and written['rows'] < n_rows
+                and written['key'] == _runs_key(cp_runs, written['rows'])):
+            # Only rows were added at the end of the raw file
+            new_rows = slice(written['rows'], n_rows)
+            new_runs = dict(cp_runs, **{name: cp_runs[name][new_rows] for name in ('run', 'alpha', 'q', 'cp')})
+            store.append(new_runs)
+            stage.count = n_rows - written['rows']
+            print(f"Cp of rows {written['rows'] + 3} to {n_rows + 2} appended to {store_path}.")
+        else:
+            store.append(cp_runs, replace=True)
+            print(f"Cp of rows 3 to {n_rows + 2} saved in {store_path}.")
+    manifest.record('store', key, rows=n_rows)
+    manifest.save()
+
+
+def export_chunked(raw_path=raw_txt_path, coordinates_path=coordinates_excel_path, store_path=cp_store_path,
+                   chunk_rows=CHUNK_ROWS):
+    """
+    Reduces a raw log of any size to the Cp store one block of runs at a time.
+
+    The raw file is never loaded as a whole: every block of chunk_rows runs
+    is parsed, reduced and written as its own store part, so the peak memory
+    stays at about one block however long the log is.
+
+    Returns:
+        int: Number of runs written.
+    """
+    with span('cp_getter.load_coordinates', 1):
+        coordinates = cached_frame(coordinates_path, read_coordinates_file, 'coordinates')
+    layout = layout_from_coordinates(coordinates)
+
+    store = CpStore(store_path)
+    n_rows = 0
+    for block in reduce_cp_chunks(raw_path, layout, chunk_rows):
+        with span('cp_getter.export_chunk', len(block['alpha'])):
+            # The first block replaces what the store held before
+            store.append(block, replace=n_rows == 0)
+        n_rows += len(block['alpha'])
+
+    # The manifest of export_all describes the runs of a full load, which this store no longer holds
+    manifest = BuildManifest(os.path.join(store_path, MANIFEST_NAME))
+    if manifest.entries.pop('store', None) is not None:
+        manifest.save()
+    print(f"Cp of rows 3 to {n_rows + 2} saved in {store_path} in blocks of {chunk_rows} rows.")
+    return n_rows
+
+
+def interactive(cp_runs, store_path=cp_store_path):
+    n_rows = len(cp_runs['alpha'])
+    print(f"Total number of data rows: {n_rows} (corresponding to rows 3 to {n_rows + 2})")
     while True:
-        user_input = input(f"Enter the row number you want to plot (starting from row 3 to {len(raw_data) + 2}), 'all' to save everything, or 'exit' to quit: ")
+        user_input = input(f"Enter the row number you want to plot (starting from row 3 to {n_rows + 2}), 'all' to save everything, or 'exit' to quit: ")
         if user_input.lower() == 'exit':
             print("Exiting the program.")
             break
         if user_input.lower() == 'all':
-            for row_num in range(3, len(raw_data) + 2):
-                plot_cp(row_num, False)
-            print(f"Plots saved for rows 3 to {len(raw_data) + 2}.")
+            export_all(cp_runs, store_path)
+            continue
         try:
             row_num = int(user_input)
-            if row_num < 3 or row_num > len(raw_data) + 2:
-                print(f"Please enter a row number between 3 and {len(raw_data) + 2}.")
+            if row_num < 3 or row_num > n_rows + 2:
+                print(f"Please enter a row number between 3 and {n_rows + 2}.")
                 continue
-            plot_cp(row_num)
+            plot_cp(cp_runs, row_num)
         except ValueError:
             print("Invalid input. Please enter a valid row number or 'exit'.")
 
+# Main Execution
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reduce raw_2D.txt to Cp per run and export it as CSV.")
+    parser.add_argument('--raw', default=raw_txt_path)
+    parser.add_argument('--coordinates', default=coordinates_excel_path)
+    parser.add_argument('--row', type=int, action='append',
+                        help="plot and export this raw_2D.txt row (repeatable) instead of asking")
+    parser.add_argument('--store', default=cp_store_path, help="Cp store the 'all' mode writes")
+    parser.add_argument('--all', action='store_true', help="export every run to the Cp store without plotting")
+    parser.add_argument('--chunk-rows', type=int, default=None, metavar='N',
+                        help="with --all: stream the raw file in blocks of N runs, for logs too big for memory")
+    parser.add_argument('--force', action='store_true', help="rewrite the Cp store even when it is up to date")
+    args = parser.parse_args(argv)
+
+    if args.all and args.chunk_rows:
+        export_chunked(args.raw, args.coordinates, args.store, args.chunk_rows)
+        return
+
+    cp_runs = load_cp_runs(args.raw, args.coordinates)
+    if args.all:
+        export_all(cp_runs, args.store, args.force)
+    elif args.row:
+        for row_num in args.row:
+            plot_cp(cp_runs, row_num)
+    else:
+        interactive(cp_runs, args.store)
+
 if __name__ == "__main__":
 
     main()
\ No newline at end of file
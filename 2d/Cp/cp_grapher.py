@@ -1,22 +1,40 @@
 
 from gettext import find
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
-import glob
+import sys
 
-# Folder paths (change these paths as per your directory structure)
-xflr5_folder = "2d\\Cp\\xflr5_results"
-experiment_folder = "2d\\Cp\\real_results\\"
-output_folder = "2d\\Cp\\combined_plots"
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 
-# Create output folder if it doesn't exist
-os.makedirs(output_folder, exist_ok=True)
+from batch_render import render_batch, render_contact_sheet
+from cp_store import CpStore, is_cp_store
+from cp_uncertainty import error_frames, load_result, run_statistics
+from data_cache import cached_frame
+from instrumentation import span
+from output_profiles import PROFILES, save_figure
+from parallel_loader import load_directory
+from polar_store import match_alphas
+from xflr5_parser import read_xflr5_frame
+
+# Folder paths next to this script, so they resolve on every OS and from any working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+xflr5_folder = os.path.join(HERE, "xflr5_results")
+experiment_folder = os.path.join(HERE, "real_results")
+# Written by the 'all' mode of cp_getter.py; used instead of experiment_folder when present
+experiment_store = os.path.join(HERE, "cp_store")
+output_folder = os.path.join(HERE, "combined_plots")
+# Averaged with their error bars when the Cp store is missing
+raw_txt_path = os.path.join(HERE, "raw_2D.txt")
+coordinates_path = os.path.join(HERE, "SLT_practical_coordinates.xlsx")
 
 
 def parse_xflr5_file(file_path):
     """
     Parses an XFLR5 file with the specified format and extracts AoA and data.
+    Repeated calls on an unchanged file are served from the binary cache.
     
     Parameters:
         file_path (str): Path to the XFLR5 data file.
@@ -24,76 +42,138 @@ def parse_xflr5_file(file_path):
     Returns:
         tuple: (alpha, dataframe), where alpha is the AoA and dataframe contains parsed data.
     """
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-    
-    # Extract AoA from the header line (assuming it starts with 'Alpha =')
-    for line in lines:
-        if line.strip().startswith("Alpha ="):
-            alpha = float(line.split('=')[1].split(',')[0].strip())
-
-            break
-    
-    # Find the starting line of the data (after the blank line following the header)
-    data_start_idx = 0
-    for i, line in enumerate(lines):
-        if line.strip() == "":
-            data_start_idx = i + 1
-            break
-    
-    # Read the data into a DataFrame
-    column_names = ["x/c", "Cpi", "Cpv", "Qi", "Qv"]
-    data = pd.read_csv(file_path, skiprows=data_start_idx, delim_whitespace=True, names=column_names)
-    return alpha, data
+    data = cached_frame(file_path, read_xflr5_frame, 'xflr5')
+    data = data.rename(columns={"x": "x/c"})
+    return data.attrs['Alpha'], data
 
 # Function to parse experimental data
 def parse_experiment_file(file_path):
     df = pd.read_csv(file_path)
-    aoa = float(file_path.split('\\')[-1].replace(".csv", ""))  # Extract AoA from filename
+    aoa = float(os.path.splitext(os.path.basename(file_path))[0])  # Extract AoA from filename
 
     return aoa, df
 
-# Load XFLR5 files
-xflr5_files = glob.glob(os.path.join(xflr5_folder, "*.txt"))
-xflr5_data = {parse_xflr5_file(file)[0]: parse_xflr5_file(file)[1] for file in xflr5_files}
+def load_results(workers=None, error_bars=False, reference_folder=xflr5_folder):
+    """
+    Loads the XFLR5 folder and the experimental results, parsing every file exactly once.
+
+    The experimental Cp comes from the Cp store in one read when it exists
+    (the latest run at every alpha), otherwise from the per-alpha CSVs.
+    With error_bars the repeated runs of every alpha are averaged instead,
+    with a Cp_err column, see cp_uncertainty.run_statistics.
 
-# Load experimental files
-experiment_files = glob.glob(os.path.join(experiment_folder, "*.csv"))
-experiment_data = {parse_experiment_file(file)[0]: parse_experiment_file(file)[1] for file in experiment_files}
+    Parameters:
+        workers (int): Pool size, defaults to the number of CPUs.
+        error_bars (bool): Average the runs of the store (or raw_2D.txt) per alpha.
+        reference_folder (str): Folder with the XFLR5 (or panel_solver.py) Cp files.
 
-# Find common angles of attack
-common_aoas = set(xflr5_data.keys()).intersection(set(experiment_data.keys()))
-print(f"Common AoAs: {sorted(common_aoas)}")
+    Returns:
+        tuple: (xflr5_data, experiment_data), both alpha -> dataframe.
+    """
+    with span('cp_grapher.load_xflr5') as stage:
+        xflr5_data = load_directory(reference_folder, "*.txt", parse_xflr5_file, workers)
+        stage.count = len(xflr5_data)
+    with span('cp_grapher.load_experiments') as stage:
+        if error_bars:
+            source = experiment_store if is_cp_store(experiment_store) else raw_txt_path
+            experiment_data = error_frames(run_statistics(load_result(source, coordinates_path)))
+        elif is_cp_store(experiment_store):
+            experiment_data = CpStore(experiment_store).latest_frames()
+        else:
+            experiment_data = load_directory(experiment_folder, "*.csv", parse_experiment_file, workers)
+        stage.count = len(experiment_data)
+    return xflr5_data, experiment_data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare XFLR5 and experimental Cp distributions.")
+    parser.add_argument('--batch', action='store_true',
+                        help="render all plots headless on the Agg backend, without showing them")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of rendering processes in batch mode")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="largest AoA difference in degrees that still counts as a match")
+    parser.add_argument('--output-profile', choices=PROFILES, default=None,
+                        help="dpi and format of the saved plots (default: report, PNG)")
+    parser.add_argument('--contact-sheet', action='store_true',
+                        help="tile all AoAs into one figure instead of one figure per AoA")
+    parser.add_argument('--error-bars', action='store_true',
+                        help="average repeated runs per alpha and draw their error bars (one figure per AoA mode)")
+    parser.add_argument('--force', action='store_true',
+                        help="render every plot, also those whose inputs did not change since the last run")
+    parser.add_argument('--xflr5', default=xflr5_folder,
+                        help="folder with the reference Cp files, e.g. panel_results of panel_solver.py "
+                             "(the inviscid Cpi column is drawn)")
+    parser.add_argument('--output', default=output_folder, help="folder the plots are saved to")
+    args = parser.parse_args(argv)
+
+    experiments = experiment_store if is_cp_store(experiment_store) else experiment_folder
+    if args.contact_sheet:
+        with span('cp_grapher.contact_sheet', 1):
+            path = render_contact_sheet(args.xflr5, experiments, args.output, 'grapher',
+                                        args.output_profile or 'preview', args.tolerance,
+                                        force=args.force)
+        print(f"Contact sheet saved as {path}")
+        return
+
+    if args.batch:
+        with span('cp_grapher.render_batch') as stage:
+            saved = render_batch(args.xflr5, experiments, args.output, 'grapher',
+                                 workers=args.workers, tolerance=args.tolerance, profile=args.output_profile,
+                                 force=args.force)
+            stage.count = len(saved)
+        print(f"Saved {len(saved)} plots in {args.output}")
+        return
+
+    # Create output folder if it doesn't exist
+    os.makedirs(args.output, exist_ok=True)
+
+    xflr5_data, experiment_data = load_results(error_bars=args.error_bars, reference_folder=args.xflr5)
+
+    # Pair every XFLR5 AoA with the nearest experimental AoA (e.g. 12.75 with 12.74)
+    with span('cp_grapher.match_alphas', len(xflr5_data)):
+        common_aoas = match_alphas(xflr5_data.keys(), experiment_data.keys(), args.tolerance)
+    print(f"Common AoAs: {common_aoas}")
+
+    # Plot data for each common AoA
+    for aoa, exp_aoa in common_aoas:
+        xflr5_df = xflr5_data[aoa]
+        exp_df = experiment_data[exp_aoa]
+
+        # Separate upper and lower surfaces in experimental data
+        exp_upper = exp_df[exp_df['Surface'] == 'Upper']
+        exp_lower = exp_df[exp_df['Surface'] == 'Lower']
+
+        print("x/c: ", xflr5_df["x/c"])
+        print("cp: ", xflr5_df["Cpi"])
+        print("x/c: ", exp_upper["x/c"])
+        print("cp: ", exp_upper["Cp"])
+        # Plotting
+        plt.figure(figsize=(10, 6))
+        plt.plot(xflr5_df["x/c"], xflr5_df["Cpi"], label="XFLR5 Cp", linestyle="--")
+        if 'Cp_err' in exp_df:
+            plt.errorbar(exp_upper["x/c"], exp_upper["Cp"], yerr=exp_upper["Cp_err"], fmt='o', color='b',
+                         capsize=3, label="Experiment Cp Upper")
+            plt.errorbar(exp_lower["x/c"], exp_lower["Cp"], yerr=exp_lower["Cp_err"], fmt='o', color='r',
+                         capsize=3, label="Experiment Cp Lower")
+        else:
+            plt.scatter(exp_upper["x/c"], exp_upper["Cp"], color='b', label="Experiment Cp Upper")
+            plt.scatter(exp_lower["x/c"], exp_lower["Cp"], color='r', label="Experiment Cp Lower")
+
+        plt.title(f"Pressure Coefficient Distribution at AoA = {aoa}")
+        plt.xlabel("x/c")
+        plt.ylabel("Cp")
+        plt.gca().invert_yaxis()  # Invert y-axis for Cp
+        plt.legend()
+        plt.grid(True)
+
+        # Save plot
+        with span('cp_grapher.savefig', 1):
+            save_figure(plt.gcf(), args.output, f"Cp_Distribution_AoA_{aoa}", args.output_profile)
+        plt.show()
+
+    print(f"Plots saved in {args.output}")
 
-# Plot data for each common AoA
-for aoa in sorted(common_aoas):
-    xflr5_df = xflr5_data[aoa]
-    exp_df = experiment_data[aoa]
-    
-    # Separate upper and lower surfaces in experimental data
-    exp_upper = exp_df[exp_df['Surface'] == 'Upper']
-    exp_lower = exp_df[exp_df['Surface'] == 'Lower']
-    
-    print("x/c: ", xflr5_df["x/c"])
-    print("cp: ", xflr5_df["Cpi"])
-    print("x/c: ", exp_upper["x/c"])
-    print("cp: ", exp_upper["Cp"])
-    # Plotting
-    plt.figure(figsize=(10, 6))
-    plt.plot(xflr5_df["x/c"], xflr5_df["Cpi"], label="XFLR5 Cp", linestyle="--")
-    plt.scatter(exp_upper["x/c"], exp_upper["Cp"], color='b', label="Experiment Cp Upper")
-    plt.scatter(exp_lower["x/c"], exp_lower["Cp"], color='r', label="Experiment Cp Lower")
-    
-    plt.title(f"Pressure Coefficient Distribution at AoA = {aoa}")
-    plt.xlabel("x/c")
-    plt.ylabel("Cp")
-    plt.gca().invert_yaxis()  # Invert y-axis for Cp
-    plt.legend()
-    plt.grid(True)
-    
-    # Save plot
-    plt.savefig(os.path.join(output_folder, f"Cp_Distribution_AoA_{aoa}.png"))
-    plt.show()
- 
 
-print(f"Plots saved in {output_folder}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#integrates the measured Cp distributions of all runs into sectional force and moment coefficients
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from cp_engine import RUN_COLUMN, load_raw_values, reduce_cp
+from tap_layout import load_tap_layout
+from wake_drag import wake_cd
+
+# Tap groups needed for the wake drag
+WAKE_GROUPS = ('wake_total', 'wake_static', 'pitot_total', 'pitot_static')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# numpy 2 renamed trapz to trapezoid
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def _integrate(y, x, method):
+    """
+    Integrates every row of y over the shared abscissa x.
+    """
+    if method == 'trapezoid':
+        return _trapezoid(y, x, axis=1)
+    if method == 'simpson':
+        from scipy.integrate import simpson
+        return simpson(y, x=x, axis=1)
+    raise ValueError(f"Unknown integration method '{method}'")
+
+
+def integrate_cp(result, method='trapezoid', moment_point=0.25):
+    """
+    Integrates the Cp matrix of reduce_cp into force coefficients for every run at once.
+
+    Both surfaces are integrated from the leading to the trailing edge over
+    the tap x/c and y/c. The normal and axial force follow from the pressure
+    acting on the contour, the lift and pressure drag from rotating them by
+    alpha.
+
+    Parameters:
+        result (dict): Output of cp_engine.reduce_cp.
+        method (str): 'trapezoid' or 'simpson' (needs scipy).
+        moment_point (float): x/c of the moment reference point.
+
+    Returns:
+        dict: Arrays 'alpha', 'CL', 'CD' (pressure drag), 'CM' (about
+        moment_point), 'CN' and 'CA', one value per run.
+    """
+    cp, x, y = result['cp'], result['x_c'], result['y_c']
+    upper, lower = result['upper'], result['lower']
+    cp_u, x_u, y_u = cp[:, upper], x[upper], y[upper]
+    cp_l, x_l, y_l = cp[:, lower], x[lower], y[lower]
+
+    # Normal force: lower surface pushes up, upper surface pulls up
+    cn = _integrate(cp_l, x_l, method) - _integrate(cp_u, x_u, method)
+    # Axial force: pressure on the forward-facing parts of the contour
+    ca = _integrate(cp_u, y_u, method) - _integrate(cp_l, y_l, method)
+    # Moment about the leading edge, positive nose up
+    cm_le = (_integrate(cp_u * x_u, x_u, method) - _integrate(cp_l * x_l, x_l, method)
+             + _integrate(cp_u * y_u, y_u, method) - _integrate(cp_l * y_l, y_l, method))
+
+    alpha = np.radians(result['alpha'])
+    return {
+        'alpha': result['alpha'],
+        'CL': cn * np.cos(alpha) - ca * np.sin(alpha),
+        'CD': cn * np.sin(alpha) + ca * np.cos(alpha),
+        'CM': cm_le + moment_point * cn,
+        'CN': cn,
+        'CA': ca,
+    }
+
+
+def polar_table(raw_values, layout, method='trapezoid'):
+    """
+    Reduces a whole raw table to a polar that grapher.load_experimental_data reads.
+
+    When the layout has a wake rake, CD is the wake (profile) drag and the
+    pressure drag is kept as CDp; without a rake CD is the pressure drag.
+
+    Returns:
+        DataFrame: One row per run with row (line number in raw_2D.txt), run,
+        alpha, CL, CD, CM, CN, CA, CDp and q.
+    """
+    result = reduce_cp(raw_values, layout)
+    coefficients = integrate_cp(result, method)
+    polar = pd.DataFrame(coefficients)
+    polar['CDp'] = polar['CD']
+    if all(group in layout for group in WAKE_GROUPS):
+        polar['CD'], _ = wake_cd(result['pressures'], layout)
+    polar.insert(0, 'run', raw_values[:, RUN_COLUMN].astype(int))
+    # Data starts at line 3 of raw_2D.txt, after the two header rows
+    polar.insert(0, 'row', np.arange(len(polar)) + 3)
+    polar['q'] = result['q']
+    return polar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Integrate the measured Cp of every run into a force polar.")
+    parser.add_argument('--raw', default=os.path.join(HERE, 'raw_2D.txt'))
+    parser.add_argument('--coordinates', default=os.path.join(HERE, 'SLT_practical_coordinates.xlsx'))
+    parser.add_argument('--output', default=os.path.join(HERE, '..', 'Forces', 'pressure_polar.csv'))
+    parser.add_argument('--method', choices=('trapezoid', 'simpson'), default='trapezoid')
+    args = parser.parse_args()
+
+    polar = polar_table(load_raw_values(args.raw), load_tap_layout(args.coordinates), args.method)
+    polar.to_csv(args.output, index=False)
+    print(f"Polar of {len(polar)} runs written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
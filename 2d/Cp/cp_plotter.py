@@ -1,60 +1,48 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from batch_render import available_aoas, render_batch, render_contact_sheet
+from cp_store import is_cp_store
+from data_cache import cached_frame
+from instrumentation import span
+from output_profiles import PROFILES, markevery, save_figure
+from xflr5_parser import read_xflr5_frame
 
-    
 
 def read_xflr5_file(filepath):
-    # Open the file and read lines
-    with open(filepath, 'r') as file:
-        lines = file.readlines()
-    
-    # Skip the first few lines to find the header (starting with "x" and column names)
-    for i, line in enumerate(lines):
-        if line.strip().startswith("x"):
-            header_index = i
-    
-    # Extract column names from the header line
-    columns = lines[header_index].split()
-    
-    # Read the data starting from the line after the header
-    data = []
-    for line in lines[header_index + 1:]:
-        # Split each line by spaces and convert to float
-        values = list(map(float, line.split()))
-        data.append(values)
-    
-    # Create a DataFrame from the parsed data
-    df = pd.DataFrame(data, columns=columns)
-   
-    index = 0
-    for i in range(header_index+1, len(df)):
-        if df["x"].iloc[i] > df["x"].iloc[i - 1]:
-            index = i
-            break
-    
-    
-        
-    return df
+    # Served from the binary cache unless the file changed since the last run
+    return cached_frame(filepath, read_xflr5_frame, 'xflr5')
 
 def read_experiment_file(filepath):
-    # Read the file using pandas read_csv with comma as delimiter
-    df = pd.read_csv(filepath)
+    # Runs from the Cp store arrive as a DataFrame, older results as CSV files
+    if isinstance(filepath, pd.DataFrame):
+        df = filepath
+    else:
+        # Read the file using pandas read_csv with comma as delimiter
+        df = pd.read_csv(filepath)
     df_upper = df[df['Surface'] == 'Upper']
     df_lower = df[df['Surface'] == 'Lower']
     return df_upper, df_lower
 
-def plot_cp_distribution(experiment_data_upper, experiment_data_lower, xflr5_data, output_folder, filename):
+def plot_cp_distribution(experiment_data_upper, experiment_data_lower, xflr5_data, output_folder, filename, profile=None):
    # Create a figure and axis
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Plot the experimental data
-    ax.plot(experiment_data_upper['x/c'], experiment_data_upper['Cp'], 'o-', color='black', label='Experimental Data Upper')
-    ax.plot(experiment_data_lower['x/c'], experiment_data_lower['Cp'], 'o-', color='red', label='Experimental Data Lower')
+    ax.plot(experiment_data_upper['x/c'], experiment_data_upper['Cp'], 'o-', color='black', label='Experimental Data Upper',
+            markevery=markevery(len(experiment_data_upper), profile))
+    ax.plot(experiment_data_lower['x/c'], experiment_data_lower['Cp'], 'o-', color='red', label='Experimental Data Lower',
+            markevery=markevery(len(experiment_data_lower), profile))
     
     # Plot the XFLR5 data
-    ax.plot(xflr5_data['x'], +xflr5_data['Cpv'], '^-', color='blue', label='XFLR5 Data')
+    ax.plot(xflr5_data['x'], +xflr5_data['Cpv'], '^-', color='blue', label='XFLR5 Data',
+            markevery=markevery(len(xflr5_data), profile))
     
     # Invert the y-axis
     ax.invert_yaxis()
@@ -70,32 +58,67 @@ def plot_cp_distribution(experiment_data_upper, experiment_data_lower, xflr5_dat
     ax.legend()
     
     # Save the plot to the output folder
-    plt.savefig(os.path.join(output_folder, f"{filename}.png"), dpi=300)
+    with span('cp_plotter.savefig', 1):
+        save_figure(fig, output_folder, filename, profile)
     
     # Show the plot
     plt.show()
     
     return fig
 
-xflr5_filepath = "2d/Cp/xflr5_results/"
-experiment_filepath = "2d/Cp/real_results/"
-output_folder = "2d/Cp/combined_plots"
+# Folder paths next to this script, so they resolve on every OS and from any working directory
+HERE = os.path.dirname(os.path.abspath(__file__))
+xflr5_filepath = os.path.join(HERE, "xflr5_results")
+experiment_filepath = os.path.join(HERE, "real_results")
+# Written by the 'all' mode of cp_getter.py; used instead of experiment_filepath when present
+experiment_store = os.path.join(HERE, "cp_store")
+output_folder = os.path.join(HERE, "combined_plots")
 
-alpha = -5.0
-while alpha < 18:
-    xflr5_file = xflr5_filepath + str(alpha) + ".txt"
-    experiment_file = experiment_filepath + str(alpha) + ".csv"
-    
-    try:
-        xflr5_data = read_xflr5_file(xflr5_file)
-        experiment_data_upper, experiment_data_lower = read_experiment_file(experiment_file)
-        
-        plot_cp_distribution(experiment_data_upper, experiment_data_lower, xflr5_data, output_folder,f"combined_cp_aoa={alpha}")
-    
-    except Exception as e:
-        print(f"AoA={alpha} not found")
-    
-    finally:
-        alpha = alpha + 0.25
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plot XFLR5 against experimental Cp for every AoA.")
+    parser.add_argument('--batch', action='store_true',
+                        help="render all plots headless on the Agg backend, without showing them")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of rendering processes in batch mode")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="largest AoA difference in degrees that still counts as a match")
+    parser.add_argument('--output-profile', choices=PROFILES, default=None,
+                        help="dpi and format of the saved plots (default: report, PNG)")
+    parser.add_argument('--contact-sheet', action='store_true',
+                        help="tile all AoAs into one figure instead of one figure per AoA")
+    parser.add_argument('--force', action='store_true',
+                        help="render every plot, also those whose inputs did not change since the last run")
+    args = parser.parse_args(argv)
+
+    experiments = experiment_store if is_cp_store(experiment_store) else experiment_filepath
+
+    if args.contact_sheet:
+        with span('cp_plotter.contact_sheet', 1):
+            path = render_contact_sheet(xflr5_filepath, experiments, output_folder, 'plotter',
+                                        args.output_profile or 'preview', args.tolerance,
+                                        force=args.force)
+        print(f"Contact sheet saved as {path}")
+        return
+
+    if args.batch:
+        with span('cp_plotter.render_batch') as stage:
+            saved = render_batch(xflr5_filepath, experiments, output_folder, 'plotter',
+                                 workers=args.workers, tolerance=args.tolerance, profile=args.output_profile,
+                                 force=args.force)
+            stage.count = len(saved)
+        print(f"Saved {len(saved)} plots in {output_folder}")
+        return
+
+    # Only visit the AoAs that have both an XFLR5 and an experimental file
+    for alpha, xflr5_file, experiment_file in available_aoas(xflr5_filepath, experiments, args.tolerance):
+        with span('cp_plotter.load', 2):
+            xflr5_data = read_xflr5_file(xflr5_file)
+            experiment_data_upper, experiment_data_lower = read_experiment_file(experiment_file)
+
+        plot_cp_distribution(experiment_data_upper, experiment_data_lower, xflr5_data, output_folder,f"combined_cp_aoa={alpha}",
+                             args.output_profile)
 
 
+if __name__ == "__main__":
+    main()
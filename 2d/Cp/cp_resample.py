@@ -0,0 +1,190 @@
+#resamples the XFLR5 Cp distributions onto the pressure tap locations and scores them against the measured Cp
+
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from cp_uncertainty import load_result
+from data_cache import cached_frame
+from instrumentation import span
+from polar_store import nearest_indices
+from xflr5_parser import read_xflr5_frame
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Weight matrices per XFLR5 paneling, keyed by the panel x/c and the tap x/c
+_weights = {}
+
+
+def split_surfaces(x):
+    """
+    Splits the XFLR5 panel points into the upper and lower surface.
+
+    XFLR5 lists the points from the trailing edge over the upper surface to
+    the leading edge (smallest x) and back over the lower surface.
+
+    Returns:
+        tuple: (upper, lower) index arrays into x, both ordered from the leading edge.
+    """
+    leading_edge = int(np.argmin(x))
+    upper = np.arange(leading_edge, -1, -1)
+    lower = np.arange(leading_edge, len(x))
+    return upper, lower
+
+
+def _surface_weights(weights, rows, x, points, tap_x):
+    # Linear interpolation weights of tap_x between the sorted surface points
+    surface_x = x[points]
+    right = np.clip(np.searchsorted(surface_x, tap_x), 1, len(points) - 1)
+    left = right - 1
+    span = surface_x[right] - surface_x[left]
+    fraction = np.divide(tap_x - surface_x[left], span, out=np.zeros(len(tap_x)), where=span > 0)
+    # Taps outside the panel range take the value of the nearest end point
+    fraction = np.clip(fraction, 0, 1)
+    weights[rows, points[left]] += 1 - fraction
+    weights[rows, points[right]] += fraction
+
+
+def interpolation_matrix(x, tap_x, tap_upper):
+    """
+    Matrix that maps the Cp at the XFLR5 panel points to the Cp at the taps.
+
+    Every row holds the two linear interpolation weights of one tap on its
+    own surface, so Cp_taps = Cp_panels @ W.T for any number of AoAs at once.
+    The matrix depends only on the paneling and the taps and is built once
+    per paneling.
+
+    Parameters:
+        x (array): x/c of the XFLR5 panel points, in file order.
+        tap_x (array): x/c of the taps.
+        tap_upper (array): True for the taps on the upper surface.
+
+    Returns:
+        array: (taps x panel points) weight matrix.
+    """
+    x = np.asarray(x, dtype=float)
+    tap_x = np.asarray(tap_x, dtype=float)
+    tap_upper = np.asarray(tap_upper, dtype=bool)
+    key = (x.tobytes(), tap_x.tobytes(), tap_upper.tobytes())
+    if key not in _weights:
+        weights = np.zeros((len(tap_x), len(x)))
+        for points, rows in zip(split_surfaces(x), (np.flatnonzero(tap_upper), np.flatnonzero(~tap_upper))):
+            _surface_weights(weights, rows, x, points, tap_x[rows])
+        _weights[key] = weights
+    return _weights[key]
+
+
+def load_xflr5_cp(folder, column='Cpv'):
+    """
+    Reads every XFLR5 Cp file of a folder and groups them by paneling.
+
+    Returns:
+        list: (x, alpha, cp) per paneling, with cp an (alphas x points) matrix.
+    """
+    groups = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.txt"))):
+        data = cached_frame(path, read_xflr5_frame, 'xflr5')
+        x = data['x'].to_numpy(dtype=float)
+        group = groups.setdefault(x.tobytes(), (x, [], []))
+        group[1].append(data.attrs['Alpha'])
+        group[2].append(data[column].to_numpy(dtype=float))
+    return [(x, np.array(alpha), np.array(cp)) for x, alpha, cp in groups.values()]
+
+
+def xflr5_at_taps(xflr5_groups, tap_x, tap_upper):
+    """
+    XFLR5 Cp of every AoA at the tap locations: one matrix product per paneling.
+
+    Returns:
+        tuple: (alpha, cp) sorted by alpha, cp as an (alphas x taps) matrix.
+    """
+    alphas, resampled = [], []
+    for x, alpha, cp in xflr5_groups:
+        alphas.append(alpha)
+        resampled.append(cp @ interpolation_matrix(x, tap_x, tap_upper).T)
+    alpha, cp = np.concatenate(alphas), np.concatenate(resampled)
+    order = np.argsort(alpha, kind='stable')
+    return alpha[order], cp[order]
+
+
+def residuals(result, xflr5_alpha, xflr5_cp, tolerance=0.05):
+    """
+    Measured minus XFLR5 Cp at every tap of every run with an XFLR5 AoA within tolerance.
+
+    Parameters:
+        result (dict): Measured runs, output of cp_engine.reduce_cp or CpStore.read.
+        xflr5_alpha, xflr5_cp: Output of xflr5_at_taps for the taps of result.
+
+    Returns:
+        dict: 'run', 'alpha', 'xflr5_alpha' per matched run, 'residual' (runs x
+        taps), and the RMS over all taps, the upper and the lower surface.
+    """
+    taps = result['upper'] | result['lower']
+    index = nearest_indices(xflr5_alpha, result['alpha'], tolerance)
+    matched = index >= 0
+    residual = result['cp'][matched][:, taps] - xflr5_cp[index[matched]]
+    upper = result['upper'][taps]
+    return {
+        'run': result['run'][matched],
+        'alpha': result['alpha'][matched],
+        'xflr5_alpha': xflr5_alpha[index[matched]],
+        'residual': residual,
+        'labels': result['labels'][taps],
+        'rms': np.sqrt(np.nanmean(residual ** 2, axis=1)),
+        'rms_upper': np.sqrt(np.nanmean(residual[:, upper] ** 2, axis=1)),
+        'rms_lower': np.sqrt(np.nanmean(residual[:, ~upper] ** 2, axis=1)),
+        'max_abs': np.nanmax(np.abs(residual), axis=1),
+    }
+
+
+def compare(source, coordinates_path, xflr5_folder, column='Cpv', tolerance=0.05):
+    """
+    Scores the XFLR5 Cp against every measured run, see residuals.
+    """
+    with span('cp_resample.load_runs') as stage:
+        result = load_result(source, coordinates_path)
+        stage.count = len(result['alpha'])
+    with span('cp_resample.load_xflr5') as stage:
+        groups = load_xflr5_cp(xflr5_folder, column)
+        stage.count = sum(len(alpha) for _, alpha, _ in groups)
+
+    taps = result['upper'] | result['lower']
+    with span('cp_resample.residuals', len(result['alpha'])):
+        xflr5_alpha, xflr5_cp = xflr5_at_taps(groups, result['x_c'][taps], result['upper'][taps])
+        return residuals(result, xflr5_alpha, xflr5_cp, tolerance)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-tap residuals and RMS error of XFLR5 against the measured Cp.")
+    parser.add_argument('--source', default=os.path.join(HERE, 'raw_2D.txt'), help="Cp store folder or raw_2D.txt")
+    parser.add_argument('--coordinates', default=os.path.join(HERE, 'SLT_practical_coordinates.xlsx'))
+    parser.add_argument('--xflr5', default=os.path.join(HERE, 'xflr5_results'), help="folder with the XFLR5 Cp files")
+    parser.add_argument('--column', choices=('Cpv', 'Cpi'), default='Cpv', help="viscous or inviscid XFLR5 Cp")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="largest AoA difference in degrees that still counts as a match")
+    parser.add_argument('--output', default=HERE, help="folder for cp_rms.csv and cp_residuals.csv")
+    args = parser.parse_args(argv)
+
+    scores = compare(args.source, args.coordinates, args.xflr5, args.column, args.tolerance)
+    rms = pd.DataFrame({key: scores[key] for key in
+                        ('run', 'alpha', 'xflr5_alpha', 'rms', 'rms_upper', 'rms_lower', 'max_abs')})
+    per_tap = pd.DataFrame(scores['residual'], columns=scores['labels'])
+    per_tap.insert(0, 'alpha', scores['alpha'])
+    per_tap.insert(0, 'run', scores['run'])
+
+    os.makedirs(args.output, exist_ok=True)
+    rms.to_csv(os.path.join(args.output, 'cp_rms.csv'), index=False)
+    per_tap.to_csv(os.path.join(args.output, 'cp_residuals.csv'), index=False)
+    print(rms.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"Residuals of {len(rms)} runs written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
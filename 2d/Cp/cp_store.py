@@ -0,0 +1,185 @@
+#one columnar store for the measured Cp of every run, instead of one real_results CSV per alpha
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from cp_engine import cp_frame
+
+PART_PATTERN = "part-*.npz"
+
+# Arrays with one entry per run and per tap inside every part
+RUN_ARRAYS = ('run_nr', 'alpha', 'q', 'cp')
+TAP_ARRAYS = ('tap', 'x_c', 'y_c', 'surface')
+
+
+def is_cp_store(path):
+    """
+    True when path is a folder holding Cp store parts.
+    """
+    return os.path.isdir(path) and bool(glob.glob(os.path.join(path, PART_PATTERN)))
+
+
+class CpStore:
+    """
+    Folder of NPZ parts with the reduced Cp of every run.
+
+    Every append writes one part in a single write: the run arrays run_nr,
+    alpha and q, the Cp matrix (runs x taps) and the tap arrays tap, x/c,
+    y/c and surface. The runs of a part are sorted by alpha, so an alpha
+    range is read with a searchsorted per part. Repeated runs at the same
+    alpha are all kept, nothing is overwritten.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.path, PART_PATTERN)))
+
+    def append(self, result, replace=False):
+        """
+        Writes all runs of a cp_engine.reduce_cp result as one new part.
+
+        Parameters:
+            result (dict): Output of reduce_cp (or a read of this store).
+            replace (bool): Remove the existing parts first, e.g. when the whole raw file is reduced again.
+
+        Returns:
+            str: Path of the new part, None when result holds no runs.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        existing = self.parts()
+        if replace:
+            for part in existing:
+                os.remove(part)
+            existing = []
+
+        n_runs = len(result['alpha'])
+        if n_runs == 0:
+            return None
+        run_nr = result.get('run')
+        if run_nr is None:
+            run_nr = np.arange(n_runs) + 1
+
+        # Only taps with a known position on one of the surfaces are stored
+        keep = result['upper'] | result['lower']
+        order = np.argsort(result['alpha'], kind='stable')
+        arrays = {
+            'run_nr': np.asarray(run_nr)[order].astype(int),
+            'alpha': np.asarray(result['alpha'], dtype=float)[order],
+            'q': np.asarray(result['q'], dtype=float)[order],
+            'cp': np.asarray(result['cp'], dtype=float)[order][:, keep],
+            'tap': np.asarray(result['labels'])[keep].astype(str),
+            'x_c': np.asarray(result['x_c'], dtype=float)[keep],
+            'y_c': np.asarray(result['y_c'], dtype=float)[keep],
+            'surface': np.where(result['upper'][keep], 'Upper', 'Lower'),
+        }
+
+        number = int(os.path.basename(existing[-1])[5:-4]) + 1 if existing else 1
+        path = os.path.join(self.path, f"part-{number:05d}.npz")
+        # Write next to the target and rename, so readers never see half a part
+        temporary = path + ".tmp"
+        with open(temporary, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, path)
+        return path
+
+    def alphas(self):
+        """
+        Returns:
+            tuple: (alpha, run_nr) of every stored run, sorted by alpha.
+        """
+        alpha, run_nr = [], []
+        for part in self.parts():
+            with np.load(part) as data:
+                alpha.append(data['alpha'])
+                run_nr.append(data['run_nr'])
+        if not alpha:
+            return np.empty(0), np.empty(0, dtype=int)
+        alpha, run_nr = np.concatenate(alpha), np.concatenate(run_nr)
+        order = np.argsort(alpha, kind='stable')
+        return alpha[order], run_nr[order]
+
+    def read(self, alpha_min=None, alpha_max=None):
+        """
+        Reads every run with alpha_min <= alpha <= alpha_max (open ends when None).
+
+        Returns:
+            dict: 'run', 'alpha', 'q', 'cp', 'labels', 'x_c', 'y_c', 'upper'
+            and 'lower' like reduce_cp, so cp_engine.surface and cp_frame work
+            on it. Runs are sorted by alpha.
+        """
+        runs = {key: [] for key in RUN_ARRAYS}
+        taps = None
+        for part in self.parts():
+            with np.load(part) as data:
+                alpha = data['alpha']
+                start = 0 if alpha_min is None else np.searchsorted(alpha, alpha_min, 'left')
+                stop = len(alpha) if alpha_max is None else np.searchsorted(alpha, alpha_max, 'right')
+                if stop <= start:
+                    continue
+                if taps is None:
+                    taps = {key: data[key] for key in TAP_ARRAYS}
+                elif not np.array_equal(taps['tap'], data['tap']):
+                    raise ValueError(f"{part} uses a different tap layout than the other parts")
+                for key in RUN_ARRAYS:
+                    runs[key].append(data[key][start:stop])
+
+        if taps is None:
+            taps = {'tap': np.empty(0, dtype=str), 'x_c': np.empty(0), 'y_c': np.empty(0),
+                    'surface': np.empty(0, dtype=str)}
+            runs = {'run_nr': np.empty(0, dtype=int), 'alpha': np.empty(0), 'q': np.empty(0),
+                    'cp': np.empty((0, 0))}
+        else:
+            runs = {key: np.concatenate(values) for key, values in runs.items()}
+            # Merge the parts into one alpha order
+            order = np.argsort(runs['alpha'], kind='stable')
+            runs = {key: values[order] for key, values in runs.items()}
+
+        return {
+            'run': runs['run_nr'],
+            'alpha': runs['alpha'],
+            'q': runs['q'],
+            'cp': runs['cp'],
+            'labels': taps['tap'],
+            'x_c': taps['x_c'],
+            'y_c': taps['y_c'],
+            'upper': taps['surface'] == 'Upper',
+            'lower': taps['surface'] == 'Lower',
+        }
+
+    def frame(self, alpha_min=None, alpha_max=None):
+        """
+        Long table of an alpha range: one row per run and tap.
+
+        Returns:
+            DataFrame: run_nr, alpha, q, tap, x/c, Cp and surface.
+        """
+        result = self.read(alpha_min, alpha_max)
+        n_runs, n_taps = result['cp'].shape
+        return pd.DataFrame({
+            'run_nr': np.repeat(result['run'], n_taps),
+            'alpha': np.repeat(result['alpha'], n_taps),
+            'q': np.repeat(result['q'], n_taps),
+            'tap': np.tile(result['labels'], n_runs),
+            'x/c': np.tile(result['x_c'], n_runs),
+            'Cp': result['cp'].ravel(),
+            'surface': np.tile(np.where(result['upper'], 'Upper', 'Lower'), n_runs),
+        })
+
+    def latest_frames(self, alpha_min=None, alpha_max=None):
+        """
+        The most recent run at every alpha in the real_results CSV layout.
+
+        Returns:
+            dict: alpha -> DataFrame (Point, x/c, Cp, Surface), sorted by alpha.
+        """
+        result = self.read(alpha_min, alpha_max)
+        latest = {}
+        for index, (alpha, run) in enumerate(zip(result['alpha'], result['run'])):
+            if alpha not in latest or run > result['run'][latest[alpha]]:
+                latest[alpha] = index
+        return {float(alpha): cp_frame(result, index) for alpha, index in latest.items()}
@@ -0,0 +1,218 @@
+#follows raw_2D.txt during a live tunnel run and reduces every newly appended row to Cp
+
+import argparse
+import json
+import os
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from cp_engine import cp_frame, reduce_cp
+from cp_store import CpStore
+from data_cache import CACHE_FOLDER
+from tap_layout import load_tap_layout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Column of the H:M:S time stamp, which is not numeric
+TIME_COLUMN = 1
+# New runs are buffered and written as one store part once this many are
+# waiting, or once the log has been quiet for FLUSH_SECONDS, so a long session
+# does not split the store into hundreds of one-run parts
+MIN_PART_ROWS = 20
+FLUSH_SECONDS = 30.0
+
+
+class RawTail:
+    """
+    Reads only the bytes appended to a raw tunnel log since the last call.
+
+    The byte offset of the first row that is not in the Cp store yet is
+    saved next to the log with save(), so a restarted script continues where
+    the previous one stopped and rows that were read but never stored are
+    read again.
+    """
+
+    def __init__(self, raw_path, from_start=False):
+        self.raw_path = raw_path
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(raw_path)), CACHE_FOLDER)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.state_path = os.path.join(cache_dir, os.path.basename(raw_path) + ".tail.json")
+
+        self.offset = None
+        self.n_columns = None
+        if not from_start and os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as file:
+                state = json.load(file)
+            self.offset, self.n_columns = state['offset'], state['n_columns']
+
+    def _read_header(self):
+        # Skip the name and unit rows; the first row gives the number of columns
+        with open(self.raw_path, 'rb') as file:
+            names = file.readline()
+            file.readline()
+            if not names.endswith(b'\n'):
+                return False
+            self.n_columns = len(names.split())
+            self.offset = file.tell()
+        return True
+
+    def save(self, offset=None):
+        """
+        Saves the offset to continue from after a restart; call it only once the rows before it are stored.
+
+        Parameters:
+            offset (int): Byte offset of the first row not stored yet, defaults to the current offset.
+        """
+        offset = self.offset if offset is None else offset
+        with open(self.state_path, 'w') as file:
+            json.dump({'offset': offset, 'n_columns': self.n_columns}, file)
+
+    def poll(self):
+        """
+        Parses the complete rows appended since the last poll.
+
+        The offset moves on in memory only; see save.
+
+        Returns:
+            array: New rows (rows x columns), the Time column as NaN. Empty when nothing was added.
+        """
+        if self.offset is None and not self._read_header():
+            return np.empty((0, 0))
+
+        size = os.path.getsize(self.raw_path)
+        if size < self.offset:
+            # The log was truncated or replaced: start over from its header
+            print(f"{self.raw_path} shrank, reading it from the start")
+            self._read_header()
+
+        with open(self.raw_path, 'rb') as file:
+            file.seek(self.offset)
+            chunk = file.read()
+
+        # Keep a partially written last row for the next poll
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return np.empty((0, self.n_columns))
+        lines = chunk[:end].decode().splitlines()
+        lines = [line for line in lines if line.strip()]
+        self.offset += end
+        if not lines:
+            return np.empty((0, self.n_columns))
+
+        usecols = [i for i in range(self.n_columns) if i != TIME_COLUMN]
+        values = np.full((len(lines), self.n_columns), np.nan)
+        values[:, usecols] = np.loadtxt(lines, usecols=usecols, ndmin=2)
+        return values
+
+
+class LivePlot:
+    """
+    Interactive Cp plot whose two lines are updated in place for every new run.
+    """
+
+    def __init__(self):
+        plt.ion()
+        self.figure, self.ax = plt.subplots(figsize=(8, 5))
+        self.upper, = self.ax.plot([], [], 'o-', color='blue', label='Upper Surface')
+        self.lower, = self.ax.plot([], [], 'o-', color='red', label='Lower Surface')
+        self.ax.set_xlabel('x/c [-]')
+        self.ax.set_ylabel('$C_p$ [-]')
+        self.ax.set_xlim(-0.05, 1.05)
+        self.ax.grid(True)
+        self.ax.legend()
+
+    def update(self, df, alpha):
+        upper = df[df['Surface'] == 'Upper']
+        lower = df[df['Surface'] == 'Lower']
+        self.upper.set_data(upper['x/c'], upper['Cp'])
+        self.lower.set_data(lower['x/c'], lower['Cp'])
+        self.ax.set_title(f"α = {alpha}°")
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        bottom, top = self.ax.get_ylim()
+        if bottom < top:
+            self.ax.set_ylim(top, bottom)
+        self.figure.canvas.draw_idle()
+        plt.pause(0.001)
+
+
+def follow(raw_path, coordinates_path, store_path, interval=1.0, from_start=False, plot=True,
+           min_rows=MIN_PART_ROWS, flush_seconds=FLUSH_SECONDS):
+    """
+    Watches the raw log and appends the Cp of every new run to the Cp store until interrupted.
+
+    Parameters:
+        raw_path (str): Path to raw_2D.txt.
+        coordinates_path (str): Path to SLT_practical_coordinates.xlsx or a tap-layout JSON.
+        store_path (str): Cp store folder; the new runs are added in parts of at least min_rows runs.
+        interval (float): Seconds between polls.
+        from_start (bool): Ignore the saved offset and reduce the whole file first.
+        plot (bool): Show a live plot of the latest run.
+        min_rows (int): Runs to buffer before a part is written.
+        flush_seconds (float): Also write the buffered runs when no new run came in for this long.
+    """
+    layout = load_tap_layout(coordinates_path)
+    store = CpStore(store_path)
+
+    tail = RawTail(raw_path, from_start)
+    live_plot = LivePlot() if plot else None
+    print(f"Following {raw_path}, press Ctrl+C to stop.")
+
+    # Raw rows read but not stored yet
+    buffered = []
+    last_row = time.monotonic()
+
+    def flush():
+        # The offset is saved only after the part is on disk, so a crash
+        # before that reads the buffered rows again on the next start
+        if buffered:
+            part = store.append(reduce_cp(np.concatenate(buffered), layout))
+            print(f"{sum(len(rows) for rows in buffered)} runs written to {part}")
+            buffered.clear()
+        tail.save()
+
+    try:
+        while True:
+            new_rows = tail.poll()
+            if len(new_rows):
+                last_row = time.monotonic()
+                buffered.append(new_rows)
+                result = reduce_cp(new_rows, layout)
+                for run, alpha, q in zip(result['run'], result['alpha'], result['q']):
+                    print(f"Run {run}: alpha = {alpha}, q = {q:.3f} Pa")
+                if live_plot:
+                    live_plot.update(cp_frame(result, len(result['alpha']) - 1), result['alpha'][-1])
+            waiting = sum(len(rows) for rows in buffered)
+            if waiting >= min_rows or (waiting and time.monotonic() - last_row >= flush_seconds):
+                flush()
+            if live_plot:
+                plt.pause(interval)
+            else:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        flush()
+        print("Stopped following.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reduce rows appended to raw_2D.txt while the tunnel is running.")
+    parser.add_argument('--raw', default=os.path.join(HERE, 'raw_2D.txt'))
+    parser.add_argument('--coordinates', default=os.path.join(HERE, 'SLT_practical_coordinates.xlsx'))
+    parser.add_argument('--store', default=os.path.join(HERE, 'cp_store'))
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between polls")
+    parser.add_argument('--from-start', action='store_true', help="ignore the saved offset")
+    parser.add_argument('--no-plot', action='store_true', help="only write the Cp store")
+    parser.add_argument('--min-rows', type=int, default=MIN_PART_ROWS,
+                        help="runs to collect before they are written as one store part")
+    parser.add_argument('--flush-seconds', type=float, default=FLUSH_SECONDS,
+                        help="also write the collected runs when the log was quiet for this long")
+    args = parser.parse_args()
+
+    follow(args.raw, args.coordinates, args.store, args.interval, args.from_start, not args.no_plot,
+           args.min_rows, args.flush_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#propagates the transducer and calibration uncertainty to Cp and the force coefficients, and averages repeated runs per alpha
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from cp_engine import Q_COEFFICIENTS, load_raw_values, reduce_cp
+from cp_integration import integrate_cp
+from cp_store import CpStore, is_cp_store
+from instrumentation import span
+from run_statistics import DEFAULT_BIN_WIDTH, DEFAULT_CONFIDENCE, alpha_bins, group_statistics, total_error
+from tap_layout import load_tap_layout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Standard uncertainties of the measurement chain, adjustable from the command line.
+# TRANSDUCER_SIGMA: noise of every pressure reading (taps and Delta_Pb) in Pa;
+# CALIBRATION_SIGMA: relative error of the q(Delta_Pb) calibration polynomial,
+# the same for every run of one campaign.
+TRANSDUCER_SIGMA = 0.5
+CALIBRATION_SIGMA = 0.01
+N_SAMPLES = 500
+
+# Cp values (samples x runs x taps) drawn at once, about 40 MB; bounds the memory of large stores
+SAMPLE_VALUES = 5_000_000
+
+COEFFICIENTS = ('CL', 'CD', 'CM')
+# Polar column of every coefficient, named like cp_integration.polar_table: the
+# integrated drag is pressure drag only, so it is CDp; CD is kept for the wake drag
+TABLE_COLUMNS = {'CL': 'CL', 'CD': 'CDp', 'CM': 'CM'}
+
+
+def _calibration_slope(q):
+    # dq/dDelta_Pb of the calibration polynomial, at the Delta_Pb that gives q
+    c0, c1, c2 = Q_COEFFICIENTS
+    delta_pb = (-c1 + np.sqrt(c1**2 - 4 * c2 * (c0 - q))) / (2 * c2)
+    return c1 + 2 * c2 * delta_pb
+
+
+def monte_carlo(result, n_samples=N_SAMPLES, transducer_sigma=TRANSDUCER_SIGMA,
+                calibration_sigma=CALIBRATION_SIGMA, method='trapezoid', seed=0):
+    """
+    Standard uncertainty of Cp and the integrated coefficients of every run.
+
+    Every sample perturbs all tap pressures and Delta_Pb readings of all runs
+    with transducer noise and scales the dynamic pressure of the whole
+    campaign with one calibration error, then reduces and integrates all
+    runs at once. Samples are drawn in batches of at most SAMPLE_VALUES Cp values.
+
+    Parameters:
+        result (dict): Output of cp_engine.reduce_cp or CpStore.read.
+        n_samples (int): Number of Monte Carlo samples.
+        transducer_sigma (float): Pressure reading noise in Pa.
+        calibration_sigma (float): Relative error of the q calibration.
+        method (str): Integration method, see cp_integration.integrate_cp.
+        seed (int): Seed of the random generator, for repeatable bands.
+
+    Returns:
+        dict: 'cp' (runs x taps) and 'CL', 'CD', 'CM' (per run) standard uncertainties.
+    """
+    rng = np.random.default_rng(seed)
+    cp, q = result['cp'], result['q']
+    n_runs, n_taps = cp.shape
+    pressures = cp * q[:, np.newaxis]
+    q_sigma = transducer_sigma * _calibration_slope(q)
+
+    # Running sums of the samples and their squares
+    sums = {name: 0.0 for name in ('cp',) + COEFFICIENTS}
+    squares = dict(sums)
+    batch_size = max(1, SAMPLE_VALUES // max(n_runs * n_taps, 1))
+    for start in range(0, n_samples, batch_size):
+        batch = min(batch_size, n_samples - start)
+        calibration = 1 + calibration_sigma * rng.standard_normal((batch, 1))
+        q_sample = (q + q_sigma * rng.standard_normal((batch, n_runs))) * calibration
+        cp_sample = ((pressures + transducer_sigma * rng.standard_normal((batch, n_runs, n_taps)))
+                     / q_sample[:, :, np.newaxis])
+
+        # Integrate all samples of all runs as one stack of runs
+        stacked = dict(result, cp=cp_sample.reshape(-1, n_taps), alpha=np.tile(result['alpha'], batch))
+        coefficients = integrate_cp(stacked, method)
+        samples = {'cp': cp_sample}
+        samples.update({name: coefficients[name].reshape(batch, n_runs) for name in COEFFICIENTS})
+        for name, values in samples.items():
+            sums[name] = sums[name] + values.sum(axis=0)
+            squares[name] = squares[name] + (values ** 2).sum(axis=0)
+
+    uncertainty = {}
+    for name in sums:
+        mean = sums[name] / n_samples
+        uncertainty[name] = np.sqrt(np.maximum(squares[name] / n_samples - mean ** 2, 0))
+    return uncertainty
+
+
+def run_statistics(result, bin_width=DEFAULT_BIN_WIDTH, confidence=DEFAULT_CONFIDENCE, n_samples=N_SAMPLES,
+                   transducer_sigma=TRANSDUCER_SIGMA, calibration_sigma=CALIBRATION_SIGMA, method='trapezoid'):
+    """
+    Averages the repeated runs of every alpha bin, for Cp and the integrated coefficients.
+
+    The error of a bin mean combines the confidence half-width of the run
+    scatter with the propagated measurement uncertainty (the RMS of the
+    Monte Carlo uncertainty of its runs, which is conservative because the
+    transducer noise partly averages out).
+
+    Returns:
+        dict: 'alpha' (bin centers), 'n' (runs per bin), the tap arrays
+        'labels', 'x_c', 'y_c', 'upper', 'lower', and for 'cp' (bins x taps)
+        and every coefficient (per bin) a dict with 'mean', 'std', 'ci', 'u'
+        (propagated uncertainty) and 'err' (total error bar).
+    """
+    with span('cp_uncertainty.monte_carlo', n_samples):
+        uncertainty = monte_carlo(result, n_samples, transducer_sigma, calibration_sigma, method)
+    coefficients = integrate_cp(result, method)
+
+    centers, inverse = alpha_bins(result['alpha'], bin_width)
+    statistics = {'alpha': centers}
+    statistics.update({key: result[key] for key in ('labels', 'x_c', 'y_c', 'upper', 'lower')})
+    with span('cp_uncertainty.group', len(centers)):
+        samples = {'cp': result['cp']}
+        samples.update({name: coefficients[name] for name in COEFFICIENTS})
+        for name, values in samples.items():
+            group = group_statistics(values, inverse, len(centers), confidence)
+            mean_square = group_statistics(uncertainty[name] ** 2, inverse, len(centers))['mean']
+            group['u'] = np.sqrt(mean_square)
+            group['err'] = total_error(group['ci'], group['u'])
+            statistics['n'] = group.pop('n')
+            statistics[name] = group
+    return statistics
+
+
+def polar_statistics_table(statistics):
+    """
+    One row per alpha bin: alpha, n_runs and mean/std/ci/u/err of every coefficient.
+
+    The CL, CDp (pressure drag) and CM columns hold the bin means, so
+    grapher.py reads the table like any polar and draws the *_err columns
+    as error bars.
+    """
+    table = pd.DataFrame({'alpha': statistics['alpha'], 'n_runs': statistics['n']})
+    for name in COEFFICIENTS:
+        column = TABLE_COLUMNS[name]
+        table[column] = statistics[name]['mean']
+        for key in ('std', 'ci', 'u', 'err'):
+            table[f'{column}_{key}'] = statistics[name][key]
+    return table
+
+
+def error_frames(statistics):
+    """
+    Mean Cp of every alpha bin in the real_results CSV layout, with a Cp_err column.
+
+    Returns:
+        dict: alpha -> DataFrame (Point, x/c, Cp, Cp_err, Surface).
+    """
+    frames = {}
+    cp = statistics['cp']
+    for index, alpha in enumerate(statistics['alpha']):
+        parts = []
+        for name, label in (('upper', 'Upper'), ('lower', 'Lower')):
+            mask = statistics[name]
+            parts.append(pd.DataFrame({
+                'Point': statistics['labels'][mask],
+                'x/c': statistics['x_c'][mask],
+                'Cp': cp['mean'][index, mask],
+                'Cp_err': cp['err'][index, mask],
+                'Surface': label,
+            }))
+        frames[float(alpha)] = pd.concat(parts, ignore_index=True)
+    return frames
+
+
+def load_result(source, coordinates_path=None):
+    """
+    Reduced runs from a Cp store folder or, with the tap coordinates, a raw_2D.txt file.
+    """
+    if is_cp_store(source):
+        return CpStore(source).read()
+    return reduce_cp(load_raw_values(source), load_tap_layout(coordinates_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Average repeated runs per alpha and propagate the measurement uncertainty.")
+    parser.add_argument('--source', default=os.path.join(HERE, 'raw_2D.txt'),
+                        help="Cp store folder or raw_2D.txt")
+    parser.add_argument('--coordinates', default=os.path.join(HERE, 'SLT_practical_coordinates.xlsx'))
+    parser.add_argument('--output', default=os.path.join(HERE, '..', 'Forces', 'pressure_polar_statistics.csv'),
+                        help="polar of the bin means with error columns, readable by grapher.py")
+    parser.add_argument('--bin-width', type=float, default=DEFAULT_BIN_WIDTH, help="alpha bin width in degrees")
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument('--samples', type=int, default=N_SAMPLES, help="Monte Carlo samples")
+    parser.add_argument('--transducer-sigma', type=float, default=TRANSDUCER_SIGMA, help="pressure noise in Pa")
+    parser.add_argument('--calibration-sigma', type=float, default=CALIBRATION_SIGMA,
+                        help="relative error of the q calibration")
+    parser.add_argument('--method', choices=('trapezoid', 'simpson'), default='trapezoid')
+    args = parser.parse_args(argv)
+
+    result = load_result(args.source, args.coordinates)
+    statistics = run_statistics(result, args.bin_width, args.confidence, args.samples,
+                                args.transducer_sigma, args.calibration_sigma, args.method)
+    table = polar_statistics_table(statistics)
+    table.to_csv(args.output, index=False)
+    print(f"{len(result['alpha'])} runs averaged into {len(table)} alpha bins, written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Bump this when the on-disk layout changes so old caches are rebuilt
+CACHE_VERSION = 1
+CACHE_FOLDER = ".cache"
+
+
+def _cache_paths(source_path, tag, cache_dir=None):
+    source_path = os.path.abspath(source_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(source_path), CACHE_FOLDER)
+    key = hashlib.sha1(f"{source_path}|{tag}".encode()).hexdigest()[:16]
+    base = os.path.join(cache_dir, f"{os.path.basename(source_path)}.{key}")
+    return cache_dir, base + ".npy", base + ".json"
+
+
+def _source_stamp(source_path):
+    stat = os.stat(source_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _write_cache(df, cache_dir, npy_path, json_path, stamp):
+    numeric, columns, objects = [], [], {}
+    for position, name in enumerate(df.columns):
+        column = df[name]
+        entry = {'name': name, 'int_name': isinstance(name, (int, np.integer)),
+                 'dtype': str(column.dtype)}
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            entry['kind'] = 'numeric'
+            numeric.append(column.to_numpy(dtype=float))
+        else:
+            # Strings (e.g. the Time column or tap labels) go to the JSON sidecar
+            entry['kind'] = 'object'
+            objects[str(position)] = [None if pd.isna(v) else v for v in column.tolist()]
+        if entry['int_name']:
+            entry['name'] = int(name)
+        columns.append(entry)
+
+    block = np.column_stack(numeric) if numeric else np.empty((len(df), 0))
+    meta = {
+        'version': CACHE_VERSION,
+        'source': stamp,
+        'n_rows': len(df),
+        'columns': columns,
+        'objects': objects,
+        'attrs': df.attrs,
+    }
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to temporary files first so a crashed run never leaves a half cache
+    with open(npy_path + ".tmp", 'wb') as file:
+        np.save(file, np.ascontiguousarray(block))
+    with open(json_path + ".tmp", 'w') as file:
+        json.dump(meta, file)
+    os.replace(npy_path + ".tmp", npy_path)
+    os.replace(json_path + ".tmp", json_path)
+
+
+def _read_cache(npy_path, json_path, stamp):
+    try:
+        with open(json_path, 'r') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION or meta.get('source') != stamp:
+        return None
+
+    try:
+        block = np.load(npy_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+    data = {}
+    numeric_index = 0
+    for position, entry in enumerate(meta['columns']):
+        if entry['kind'] == 'numeric':
+            values = block[:, numeric_index]
+            numeric_index += 1
+            if entry['dtype'] != 'float64':
+                values = values.astype(entry['dtype'])
+        else:
+            values = meta['objects'][str(position)]
+        data[position] = values
+
+    df = pd.DataFrame(data, index=pd.RangeIndex(meta['n_rows']))
+    df.columns = [entry['name'] for entry in meta['columns']]
+    df.attrs.update(meta['attrs'])
+    return df
+
+
+def cached_frame(source_path, loader, tag, cache_dir=None):
+    """
+    Loads a table through a binary cache keyed on source path, size and mtime.
+
+    The first call parses the source with loader and stores the numeric columns
+    as a memory-mapped .npy file (strings and df.attrs go to a JSON sidecar).
+    Later calls read that directly and only re-parse when the source changed.
+
+    Parameters:
+        source_path (str): Path to the source file.
+        loader (callable): loader(source_path) -> DataFrame with a default index.
+        tag (str): Distinguishes different loaders reading the same file.
+        cache_dir (str): Cache folder, defaults to .cache next to the source.
+
+    Returns:
+        DataFrame: The loaded table.
+    """
+    stamp = _source_stamp(source_path)
+    cache_dir, npy_path, json_path = _cache_paths(source_path, tag, cache_dir)
+
+    df = _read_cache(npy_path, json_path, stamp)
+    if df is not None:
+        return df
+
+    df = loader(source_path)
+    try:
+        _write_cache(df, cache_dir, npy_path, json_path, stamp)
+    except (OSError, TypeError, ValueError) as e:
+        # A read-only data folder should not stop the analysis
+        print(f"Could not cache {source_path}: {e}")
+    return df
@@ -0,0 +1,145 @@
+#describes which raw_2D.txt pressure column belongs to which tap group (airfoil surfaces, wake rakes, pitot tube)
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cache import cached_frame
+
+# Column of P001 in raw_2D.txt (after Run_nr, Time, Alpha, Delta_Pb, P_bar, T, rpm, rho)
+FIRST_TAP_COLUMN = 8
+
+# Groups that are sampled on the airfoil contour and reduced to Cp
+SURFACE_GROUPS = ('upper', 'lower')
+
+
+def tap_number(label):
+    # 'P026' -> 26
+    return int(str(label).strip().lstrip('Pp'))
+
+
+def tap_label(number):
+    return f'P{str(number).zfill(3)}'
+
+
+class TapLayout:
+    """
+    Tap groups with precomputed raw-column index arrays.
+
+    Every group holds its tap labels, the matching raw_2D.txt column indices
+    and, where known, the tap positions ('x'/'y' in chord fractions for the
+    airfoil, 'position' in mm for the wake rakes). All group columns are also
+    concatenated into one index array, so a single fancy-index gather pulls
+    every group out of the full run matrix.
+    """
+
+    def __init__(self, groups):
+        self.groups = {}
+        for name, group in groups.items():
+            numbers = np.array([tap_number(label) for label in group['taps']], dtype=int)
+            entry = {
+                'labels': np.array([tap_label(n) for n in numbers]),
+                'columns': FIRST_TAP_COLUMN + numbers - 1,
+            }
+            for key in ('x', 'y', 'position'):
+                if key in group:
+                    entry[key] = np.asarray(group[key], dtype=float)
+            self.groups[name] = entry
+
+        # Slices of every group inside the concatenated gather
+        self.columns = np.concatenate([g['columns'] for g in self.groups.values()])
+        self.slices = {}
+        start = 0
+        for name, group in self.groups.items():
+            self.slices[name] = slice(start, start + len(group['columns']))
+            start += len(group['columns'])
+
+    def __getitem__(self, name):
+        return self.groups[name]
+
+    def __contains__(self, name):
+        return name in self.groups
+
+    @property
+    def n_taps(self):
+        # Highest tap number that any group uses
+        return int(self.columns.max()) - FIRST_TAP_COLUMN + 1
+
+    def gather(self, raw_values):
+        """
+        Pulls every group out of the (runs x columns) raw matrix in one gather.
+
+        Returns:
+            dict: group name -> (runs x taps) pressures in Pa.
+        """
+        raw_values = np.asarray(raw_values, dtype=float)
+        if raw_values.shape[1] <= self.columns.max():
+            missing = self.columns.max() + 1 - raw_values.shape[1]
+            print(f"Warning: {missing} pressure columns missing in the raw data, filled with 0.")
+            raw_values = np.pad(raw_values, ((0, 0), (0, missing)))
+        gathered = raw_values[:, self.columns]
+        return {name: gathered[:, s] for name, s in self.slices.items()}
+
+
+def layout_from_coordinates(coordinates):
+    """
+    Builds the tap layout from the SLT_practical_coordinates.xlsx sheet.
+
+    The sheet lists the airfoil taps with x, y in percent of the chord
+    (columns 0-2), the total wake rake probes with their position in mm
+    (columns 4-5), the static wake rake probes (columns 7-8) and the two
+    pitot-static tube taps (columns 10-11). The airfoil taps run along the
+    upper surface to the trailing edge and then start again at the leading
+    edge for the lower surface.
+    """
+    airfoil = coordinates.iloc[:, [0, 1, 2]].dropna()
+    labels = airfoil.iloc[:, 0].astype(str).to_numpy()
+    x = airfoil.iloc[:, 1].to_numpy(dtype=float) / 100
+    y = airfoil.iloc[:, 2].to_numpy(dtype=float) / 100
+
+    # The lower surface starts where x jumps back to the leading edge
+    jumps = np.nonzero(np.diff(x) < 0)[0]
+    split = jumps[0] + 1 if len(jumps) else len(x)
+
+    groups = {
+        'upper': {'taps': labels[:split], 'x': x[:split], 'y': y[:split]},
+        'lower': {'taps': labels[split:], 'x': x[split:], 'y': y[split:]},
+    }
+
+    for name, label_column, position_column in (('wake_total', 4, 5), ('wake_static', 7, 8)):
+        rake = coordinates.iloc[:, [label_column, position_column]].dropna()
+        if len(rake):
+            groups[name] = {'taps': rake.iloc[:, 0].astype(str).to_numpy(),
+                            'position': rake.iloc[:, 1].to_numpy(dtype=float)}
+
+    if coordinates.shape[1] > 11:
+        pitot = coordinates.iloc[:, [10, 11]].dropna()
+        for label, description in pitot.itertuples(index=False):
+            if 'total' in description:
+                groups['pitot_total'] = {'taps': [label]}
+            elif 'static' in description:
+                groups['pitot_static'] = {'taps': [label]}
+
+    return TapLayout(groups)
+
+
+def load_tap_layout(path):
+    """
+    Loads a tap layout from the coordinates workbook or from a small JSON config.
+
+    The JSON form is {"groups": {"upper": {"taps": ["P001", ...], "x": [...], "y": [...]}, ...}}
+    with x and y as chord fractions and rake positions under "position" in mm.
+
+    Parameters:
+        path (str): Path to an .xlsx workbook or a .json config.
+
+    Returns:
+        TapLayout: The layout.
+    """
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, 'r') as file:
+            return TapLayout(json.load(file)['groups'])
+    coordinates = cached_frame(path, lambda p: pd.read_excel(p, sheet_name=0), 'coordinates')
+    return layout_from_coordinates(coordinates)
@@ -0,0 +1,109 @@
+#computes the profile drag of every run from the wake rake with the Jones momentum-deficit integral
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from cp_engine import ALPHA_COLUMN, RUN_COLUMN, load_raw_values
+from tap_layout import load_tap_layout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Chord of the SD6060 wind tunnel model in mm
+CHORD_MM = 160.0
+
+# numpy 2 renamed trapz to trapezoid
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def static_interpolation_matrix(total_positions, static_positions):
+    """
+    Linear interpolation weights from the static rake probes to the total rake probes.
+
+    Built once per layout; p_static @ W.T then gives the static pressure at
+    every total-pressure probe for all runs at once. Outside the static rake
+    the nearest static probe is used.
+
+    Returns:
+        array: (total probes x static probes) weight matrix.
+    """
+    order = np.argsort(static_positions)
+    weights = np.zeros((len(total_positions), len(static_positions)))
+    for j, column in enumerate(order):
+        unit = np.zeros(len(static_positions))
+        unit[j] = 1.0
+        weights[:, column] = np.interp(total_positions, np.asarray(static_positions)[order], unit)
+    return weights
+
+
+def wake_cd(pressures, layout, chord_mm=CHORD_MM):
+    """
+    Jones' wake drag for all runs at once.
+
+    cd = 2/c * integral sqrt((p_tw - p_sw)/q) * (1 - sqrt((p_tw - p_s)/q)) dy
+
+    with p_tw and p_sw the total and static pressure in the wake, p_s the
+    freestream static pressure and q the freestream dynamic pressure, both
+    from the pitot-static tube.
+
+    Parameters:
+        pressures (dict): Group pressures from cp_engine.reduce_cp or TapLayout.gather.
+        layout (TapLayout): Layout with wake_total, wake_static, pitot_total and pitot_static.
+        chord_mm (float): Model chord in mm, in the same unit as the rake positions.
+
+    Returns:
+        tuple: (cd, q) arrays with one value per run.
+    """
+    y = layout['wake_total']['position']
+    weights = static_interpolation_matrix(y, layout['wake_static']['position'])
+
+    p_total = pressures['wake_total']
+    p_static = pressures['wake_static'] @ weights.T
+    p_inf = pressures['pitot_static'][:, :1]
+    q = pressures['pitot_total'][:, :1] - p_inf
+
+    # Sensor noise can make the differences slightly negative outside the wake
+    local = np.sqrt(np.clip((p_total - p_static) / q, 0, None))
+    total = np.sqrt(np.clip((p_total - p_inf) / q, 0, None))
+
+    order = np.argsort(y)
+    integrand = (local * (1 - total))[:, order]
+    cd = 2 / chord_mm * _trapezoid(integrand, y[order], axis=1)
+    return cd, q[:, 0]
+
+
+def wake_table(raw_values, layout, chord_mm=CHORD_MM):
+    """
+    Wake drag of every run of a raw table.
+
+    Returns:
+        DataFrame: row (line number in raw_2D.txt), run, alpha, CD_wake and q_pitot.
+    """
+    cd, q = wake_cd(layout.gather(raw_values), layout, chord_mm)
+    return pd.DataFrame({
+        # Data starts at line 3 of raw_2D.txt, after the two header rows
+        'row': np.arange(len(raw_values)) + 3,
+        'run': raw_values[:, RUN_COLUMN].astype(int),
+        'alpha': raw_values[:, ALPHA_COLUMN],
+        'CD_wake': cd,
+        'q_pitot': q,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the wake-rake drag coefficient of every run.")
+    parser.add_argument('--raw', default=os.path.join(HERE, 'raw_2D.txt'))
+    parser.add_argument('--coordinates', default=os.path.join(HERE, 'SLT_practical_coordinates.xlsx'))
+    parser.add_argument('--output', default=os.path.join(HERE, 'wake_drag.csv'))
+    parser.add_argument('--chord', type=float, default=CHORD_MM, help="model chord in mm")
+    args = parser.parse_args()
+
+    table = wake_table(load_raw_values(args.raw), load_tap_layout(args.coordinates), args.chord)
+    table.to_csv(args.output, index=False)
+    print(f"Wake drag of {len(table)} runs written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,77 @@
 #program to use mathplotlib to plot a comparison between XFLR5 numerical analysis data and data from the TU Delft low speed wind tunnel
 
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
-def load_xflr5_data(filename):
-    data = np.genfromtxt(filename, skip_header=11)
-    
-    # Extract columns
-    alpha = data[:, 0]  # Angle of attack
-    cl = data[:, 1]     # Lift coefficient
-    cd = data[:, 2]     # Drag coefficient
-    cm = data[:, 4]     # Moment coefficient
-    
-    # Filter for step size of 1 up to alpha = 9
-    mask1 = (alpha <= 9) & (alpha % 1 == 0)
-    
-    # Filter for step size of 0.5 beyond alpha = 9
-    mask2 = (alpha > 9) & (alpha % 0.5 == 0)
-    
-    # Combine the two masks
-    mask = mask1 | mask2
-    
-    # Apply the combined mask to filter the data
-    alpha_filtered = alpha[mask]
-    cl_filtered = cl[mask]
-    cd_filtered = cd[mask]
-    cm_filtered = cm[mask]
-    
-    return alpha_filtered, cl_filtered, cd_filtered, cm_filtered
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from polar_store import PolarStore
+from instrumentation import span
+from output_profiles import PROFILES, markevery, save_figure
+from xflr5_parser import read_xflr5
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load_xflr5_data(filename, alphas=None):
+    """
+    Load an XFLR5 polar, optionally interpolated at given angles of attack.
+
+    Without alphas the full-resolution polar is returned. With alphas the
+    polar is sampled at exactly those angles (NaN outside its range), so it
+    lines up with the wind tunnel points without relying on float equality.
+    """
+    store = PolarStore()
+    store.add_xflr5('xflr5', read_xflr5(filename))
+
+    if alphas is None:
+        alphas = store.alphas('xflr5')
+    values = store.at('xflr5', alphas, ['CL', 'CD', 'Cm'])
+
+    # Angle of attack, lift, drag and moment coefficient
+    return np.asarray(alphas, dtype=float), values['CL'], values['CD'], values['Cm']
 
 def load_experimental_data(csv_filename):
-    """Load experimental wind tunnel data from a CSV file."""
+    """
+    Load experimental wind tunnel data from a CSV file.
+
+    CD is the wake (or total) drag; a polar with only the pressure drag
+    CDp, like the one of cp_uncertainty.py, is drawn with CDp instead. That
+    polar also has *_err columns; they are returned as a fourth element
+    (None for a plain polar).
+    """
     df = pd.read_csv(csv_filename)
     alpha = df['alpha'].values
     cl = df['CL'].values
-    cd = df['CD'].values
-    return alpha, cl, cd
+    drag = 'CD' if 'CD' in df else 'CDp'
+    cd = df[drag].values
+    errors = None
+    if 'CL_err' in df and f'{drag}_err' in df:
+        errors = (df['CL_err'].values, df[f'{drag}_err'].values)
+    return alpha, cl, cd, errors
 
-def create_plots(xflr5_data, windtunnel_data):
+def create_plots(xflr5_data, windtunnel_data, output_folder='.', profile=None):
     plt.rcParams.update({'font.size': 13})
     alpha_xflr5, cl_xflr5, cd_xflr5, _ = xflr5_data
-    alpha_wt, cl_wt, cd_wt = windtunnel_data
+    alpha_wt, cl_wt, cd_wt = windtunnel_data[:3]
+    # Error bars of averaged runs, see load_experimental_data
+    cl_err, cd_err = windtunnel_data[3] if len(windtunnel_data) > 3 and windtunnel_data[3] else (None, None)
      
     # Create Lift coefficient plot
     fig1, ax1 = plt.subplots(figsize=(8, 6))
     
     # Plot data with markers and lines
-    ax1.plot(alpha_wt, cl_wt, 'o-', color='black', label='Wind Tunnel', 
-             markerfacecolor='orange', markeredgecolor='black', markersize=8)
+    ax1.errorbar(alpha_wt, cl_wt, yerr=cl_err, fmt='o-', color='black', label='Wind Tunnel',
+                 markerfacecolor='orange', markeredgecolor='black', markersize=8, capsize=3,
+                 markevery=markevery(len(alpha_wt), profile))
     ax1.plot(alpha_xflr5, cl_xflr5, '^-', color='black', label='Numerical Analysis',
-             markerfacecolor='pink', markeredgecolor='black', markersize=8)
+             markerfacecolor='pink', markeredgecolor='black', markersize=8,
+             markevery=markevery(len(alpha_xflr5), profile))
     
     # Customize the plot
     ax1.set_xlabel(r'$\alpha$ (deg)')
@@ -63,16 +84,19 @@ def create_plots(xflr5_data, windtunnel_data):
     ax1.legend()
     
     # Save the first plot
-    plt.savefig('lift_coefficient.png', dpi=1000, bbox_inches='tight')
+    with span('polar.savefig', 1):
+        save_figure(fig1, output_folder, 'lift_coefficient', profile, bbox_inches='tight')
     
     # Create figure 2: Drag coefficient
     fig2, ax2 = plt.subplots(figsize=(8, 6))
     
     # Plot data with markers and lines
-    ax2.plot(alpha_wt, cd_wt, 'o-', color='black', label='Wind Tunnel', 
-             markerfacecolor='orange', markeredgecolor='black', markersize=8)
+    ax2.errorbar(alpha_wt, cd_wt, yerr=cd_err, fmt='o-', color='black', label='Wind Tunnel',
+                 markerfacecolor='orange', markeredgecolor='black', markersize=8, capsize=3,
+                 markevery=markevery(len(alpha_wt), profile))
     ax2.plot(alpha_xflr5, cd_xflr5, '^-', color='black', label='Numerical Analysis',
-             markerfacecolor='pink', markeredgecolor='black', markersize=8)
+             markerfacecolor='pink', markeredgecolor='black', markersize=8,
+             markevery=markevery(len(alpha_xflr5), profile))
     
     # Customize the plot
     ax2.set_xlabel(r'$\alpha$ (deg)')
@@ -84,21 +108,38 @@ def create_plots(xflr5_data, windtunnel_data):
     ax2.legend()
     
     # Save the second plot
-    plt.savefig('drag_coefficient.png', dpi=1000, bbox_inches='tight')
+    with span('polar.savefig', 1):
+        save_figure(fig2, output_folder, 'drag_coefficient', profile, bbox_inches='tight')
  
     plt.show()
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the XFLR5 polar with the wind tunnel polar.")
+    parser.add_argument('--xflr5', default=os.path.join(HERE, "SD6060-104-88_T1_Re0.231_M0.00_N9.0.txt"))
+    parser.add_argument('--experiment', default=os.path.join(HERE, "plots_data.csv"),
+                        help="wind tunnel polar with alpha, CL and CD (or only the pressure drag CDp) columns")
+    parser.add_argument('--output-profile', choices=PROFILES, default=None,
+                        help="dpi and format of the saved plots (default: report, PNG)")
+    parser.add_argument('--output', default=HERE, help="folder the plots are saved to")
+    args = parser.parse_args(argv)
+
+    # Experimental data
+    alpha_exp = np.linspace(0, 20, 20)
+    cl_exp = 0.095 * alpha_exp * (1 - alpha_exp/25)
+    cd_exp = 0.015 + 0.002 * alpha_exp
+
+    # Create the data tuples
+    with span('polar.load_experiment', 1):
+        experimental_data = load_experimental_data(args.experiment)
+    # Sample the numerical polar at the angles measured in the tunnel
+    with span('polar.load_xflr5', 1):
+        xflr5_data = load_xflr5_data(args.xflr5, np.unique(experimental_data[0]))
+    #experimental_data = (alpha_exp, cl_exp, cd_exp)
 
-# Experimental data
-alpha_exp = np.linspace(0, 20, 20)
-cl_exp = 0.095 * alpha_exp * (1 - alpha_exp/25)
-cd_exp = 0.015 + 0.002 * alpha_exp
+    # Generate the plots
+    create_plots(xflr5_data, experimental_data, args.output, args.output_profile)
 
-# Create the data tuples
-xflr5_data = load_xflr5_data("SD6060-104-88_T1_Re0.231_M0.00_N9.0.txt")
-experimental_data = load_experimental_data("plots_data.csv")
-#experimental_data = (alpha_exp, cl_exp, cd_exp)
 
-# Generate the plots
-create_plots(xflr5_data, experimental_data)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,25 @@
 #program to use mathplotlib to plot a comparison between XFLR5 numerical analysis data and data from the TU Delft low speed wind tunnel
 
+import argparse
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
-def load_xflr5_data(filename):
-    # Read the file and extract relevant lines
-    with open(filename, 'r') as file:
-        lines = file.readlines()
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-    # Find the header line and data lines
-    data_start_index = next(i for i, line in enumerate(lines) if "alpha" in line)
-    header_line = lines[data_start_index].split()
-    data_lines = lines[data_start_index + 1:]
+from instrumentation import span
+from output_profiles import PROFILES, markevery, save_figure
+from xflr5_parser import read_xflr5
 
-    # Extract the alpha column data
-    data = []
-    for line in data_lines:
-        if line.strip():  # Ignore empty lines
-            try:
-                values = line.split()
-                # Extract alpha, CL, CDi (columns 0, 2, and 3 respectively)
-                alpha = float(values[0])
-                cl = float(values[2])
-                cd = float(values[5])
-                data.append([alpha, cl, cd])
-            except (IndexError, ValueError):
-                pass  # Skip lines that don't have numeric data
+HERE = os.path.dirname(os.path.abspath(__file__))
 
-    # Create a DataFrame for the extracted values
-    df = pd.DataFrame(data, columns=["alpha", "CL", "CD"])
-    return df["alpha"].values, df["CL"].values, df["CD"].values
+def load_xflr5_data(filename):
+    data = read_xflr5(filename)
+    return data["alpha"], data["CL"], data["CD"]
 
 def load_experimental_data(csv_filename):
     """Load experimental wind tunnel data from a CSV file."""
@@ -40,7 +29,7 @@ def load_experimental_data(csv_filename):
     cd = df['CD'].values
     return alpha, cl, cd
 
-def create_plots(xflr5_data, windtunnel_data):
+def create_plots(xflr5_data, windtunnel_data, output_folder='.', profile=None):
     plt.rcParams.update({'font.size': 13})
     alpha_xflr5, cl_xflr5, cd_xflr5 = xflr5_data
     alpha_wt, cl_wt, cd_wt = windtunnel_data
@@ -50,9 +39,11 @@ def create_plots(xflr5_data, windtunnel_data):
     
     # Plot data with markers and lines
     ax1.plot(alpha_wt, cl_wt, 'o-', color='black', label='Wind Tunnel', 
-             markerfacecolor='orange', markeredgecolor='black', markersize=8)
+             markerfacecolor='orange', markeredgecolor='black', markersize=8,
+             markevery=markevery(len(alpha_wt), profile))
     ax1.plot(alpha_xflr5, cl_xflr5, '^-', color='black', label='Numerical Analysis',
-             markerfacecolor='pink', markeredgecolor='black', markersize=8)
+             markerfacecolor='pink', markeredgecolor='black', markersize=8,
+             markevery=markevery(len(alpha_xflr5), profile))
     
     # Customize the plot
     ax1.set_xlabel(r'$\alpha$ (deg)')
@@ -65,16 +56,19 @@ def create_plots(xflr5_data, windtunnel_data):
     ax1.legend()
     
     # Save the first plot
-    plt.savefig('lift_coefficient.png', dpi=1000, bbox_inches='tight')
+    with span('wing3d.savefig', 1):
+        save_figure(fig1, output_folder, 'lift_coefficient', profile, bbox_inches='tight')
     
     # Create figure 2: Drag coefficient
     fig2, ax2 = plt.subplots(figsize=(8, 6))
     
     # Plot data with markers and lines
     ax2.plot(alpha_wt, cd_wt, 'o-', color='black', label='Wind Tunnel', 
-             markerfacecolor='orange', markeredgecolor='black', markersize=8)
+             markerfacecolor='orange', markeredgecolor='black', markersize=8,
+             markevery=markevery(len(alpha_wt), profile))
     ax2.plot(alpha_xflr5, cd_xflr5, '^-', color='black', label='Numerical Analysis',
-             markerfacecolor='pink', markeredgecolor='black', markersize=8)
+             markerfacecolor='pink', markeredgecolor='black', markersize=8,
+             markevery=markevery(len(alpha_xflr5), profile))
     
     # Customize the plot
     ax2.set_xlabel(r'$\alpha$ (deg)')
@@ -86,21 +80,36 @@ def create_plots(xflr5_data, windtunnel_data):
     ax2.legend()
     
     # Save the second plot
-    plt.savefig('drag_coefficient.png', dpi=1000, bbox_inches='tight')
+    with span('wing3d.savefig', 1):
+        save_figure(fig2, output_folder, 'drag_coefficient', profile, bbox_inches='tight')
  
     plt.show()
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two XFLR5 wing polars.")
+    parser.add_argument('--xflr5', default=os.path.join(HERE, "xflr5_data", "3d Wing analyses_T1-22_6 m_s-VLM1.txt"))
+    parser.add_argument('--reference', default=os.path.join(HERE, "xflr5_data", "3d Wing analyses_T1-22_6 m_s-Panel-Inviscid.txt"),
+                        help="polar drawn as the 'Wind Tunnel' series")
+    parser.add_argument('--output-profile', choices=PROFILES, default=None,
+                        help="dpi and format of the saved plots (default: report, PNG)")
+    parser.add_argument('--output', default='.', help="folder the plots are saved to")
+    args = parser.parse_args(argv)
+
+    # Experimental data
+    alpha_exp = np.linspace(0, 20, 20)
+    cl_exp = 0.095 * alpha_exp * (1 - alpha_exp/25)
+    cd_exp = 0.015 + 0.002 * alpha_exp
+
+    # Create the data tuples
+    with span('wing3d.load_xflr5', 2):
+        xflr5_data = load_xflr5_data(args.xflr5)
+        experimental_data = load_xflr5_data(args.reference)
+    #experimental_data = (alpha_exp, cl_exp, cd_exp)
 
-# Experimental data
-alpha_exp = np.linspace(0, 20, 20)
-cl_exp = 0.095 * alpha_exp * (1 - alpha_exp/25)
-cd_exp = 0.015 + 0.002 * alpha_exp
+    # Generate the plots
+    create_plots(xflr5_data, experimental_data, args.output, args.output_profile)
 
-# Create the data tuples
-xflr5_data = load_xflr5_data("3D\\xflr5_data\\3d Wing analyses_T1-22_6 m_s-VLM1.txt")
-experimental_data = load_xflr5_data("3D\\xflr5_data\\3d Wing analyses_T1-22_6 m_s-Panel-Inviscid.txt")
-#experimental_data = (alpha_exp, cl_exp, cd_exp)
 
-# Generate the plots
-create_plots(xflr5_data, experimental_data)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
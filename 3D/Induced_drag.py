@@ -1,59 +1,181 @@
+import argparse
+import glob
+import re
 import pandas as pd
-import matplotlib.pyplot as plt
 import math
+import numpy as np
+import os
+import sys
 
-# Define the file path
-file_path = '3D\\xflr5_data\\3d Wing analyses_T1-22_6 m_s-VLM1.txt'
-
-# Read the file and extract relevant lines
-with open(file_path, 'r') as file:
-    lines = file.readlines()
-
-# Find the header line and data lines
-data_start_index = next(i for i, line in enumerate(lines) if "alpha" in line)
-header_line = lines[data_start_index].split()
-data_lines = lines[data_start_index + 1:]
-
-# Extract the alpha column data
-data = []
-for line in data_lines:
-    if line.strip():  # Ignore empty lines
-        try:
-            values = line.split()
-            # Extract alpha, CL, CDi (columns 0, 2, and 3 respectively)
-            alpha = float(values[0])
-            cl = float(values[2])
-            cdi = float(values[3])
-            data.append([alpha, cl, cdi])
-        except (IndexError, ValueError):
-            pass  # Skip lines that don't have numeric data
-
-# Create a DataFrame for the extracted values
-df = pd.DataFrame(data, columns=["alpha", "CL", "CDi"])
-
-# Display the table
-print(df)
-
-#CDi calculated
-AR = 800**2 / (800*160)
-e = 1
-CDi_calc = df["CL"]**2 / (math.pi * AR * e)
-
-# Plot alpha vs CL
-plt.figure(figsize=(8, 6))
-plt.plot(df["alpha"], CDi_calc, marker='o', linestyle='-', color='b', label='CD_calc vs alpha')
-plt.plot(df["alpha"], df["CDi"], marker='^', linestyle='-', color='r', label='CDi vs alpha')
-plt.title("Alpha vs CDi", fontsize=14)
-plt.xlabel("Alpha (degrees)", fontsize=12)
-plt.ylabel("CL (Lift Coefficient)", fontsize=12)
-plt.grid(True, linestyle='--', alpha=0.7)
-plt.legend(fontsize=10)
-plt.show()
-
-'''
-# Save the table to a CSV (optional)
-output_path = 'alpha_cl_cdi_values.csv'
-df.to_csv(output_path, index=False)
-print(f"Data saved to {output_path}")
-'''
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
+from instrumentation import span
+from parallel_loader import load_files
+from xflr5_parser import POLAR_3D, read_xflr5
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Wing of the T1 analyses, used when a polar header has no span or area
+SPAN_MM = 800
+AREA_MM2 = 800 * 160
+
+# Conversion of the units XFLR5 writes after lengths and areas to mm
+_LENGTH_UNITS = {'mm': 1.0, 'cm': 10.0, 'm': 1000.0, 'in': 25.4, 'ft': 304.8}
+_VALUE = re.compile(r'([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)\s*([a-zA-Z]*)')
+
+
+def _header_value(meta, word, power):
+    """
+    Finds a header entry whose key contains word (e.g. 'span') and converts it to mm**power.
+
+    Returns:
+        float: The value, or None when the header has no such entry.
+    """
+    for key, value in meta.items():
+        if word in key.lower() and isinstance(value, str):
+            match = _VALUE.search(value)
+            if match:
+                scale = _LENGTH_UNITS.get(match.group(2).lower(), 1.0)
+                return float(match.group(1)) * scale**power
+    return None
+
+
+def wing_geometry(meta, span_mm=SPAN_MM, area_mm2=AREA_MM2):
+    """
+    Span and area of the wing of a polar, from its header where available.
+
+    Returns:
+        tuple: (span in mm, area in mm², aspect ratio)
+    """
+    span = _header_value(meta, 'span', 1) or span_mm
+    area = _header_value(meta, 'area', 2) or area_mm2
+    return span, area, span**2 / area
+
+
+def fit_oswald(cl, cdi, file_index, aspect_ratio):
+    """
+    Fits the Oswald efficiency of many polars at once.
+
+    Every polar is fitted to CDi = k * CL² by least squares through the
+    origin, k = sum(CL² CDi) / sum(CL⁴), and e = 1 / (pi AR k). The points of
+    all polars are stacked into one array and the per-polar sums are taken
+    with bincount, so the fit costs the same for one file or a whole sweep.
+
+    Parameters:
+        cl, cdi (array): Stacked lift and induced drag coefficients of all polars.
+        file_index (array): Polar number of every stacked point.
+        aspect_ratio (array): Aspect ratio of every polar.
+
+    Returns:
+        tuple: (e, k, rms residual of CDi, number of points), one value per polar.
+    """
+    n_files = len(aspect_ratio)
+    cl2 = cl**2
+    n = np.bincount(file_index, minlength=n_files)
+    k = (np.bincount(file_index, cl2 * cdi, n_files)
+         / np.bincount(file_index, cl2 * cl2, n_files))
+    residual = cdi - k[file_index] * cl2
+    rms = np.sqrt(np.bincount(file_index, residual**2, n_files) / np.maximum(n, 1))
+    e = 1 / (math.pi * np.asarray(aspect_ratio) * k)
+    return e, k, rms, n
+
+
+def induced_drag_summary(files, span_mm=SPAN_MM, area_mm2=AREA_MM2, workers=None):
+    """
+    Loads a batch of wing polars and fits e and AR for every one of them.
+
+    Returns:
+        DataFrame: One row per polar with file, plane, polar, span_mm, area_mm2,
+        AR, k, e, rms_CDi and points.
+    """
+    with span('induced_drag.load', len(files)):
+        polars = [(file, data) for file, data in zip(files, load_files(files, read_xflr5, workers))
+                  if data.kind == POLAR_3D]
+    if not polars:
+        return pd.DataFrame()
+
+    geometry = np.array([wing_geometry(data.meta, span_mm, area_mm2) for _, data in polars])
+    cl = np.concatenate([data['CL'] for _, data in polars])
+    cdi = np.concatenate([data['CDi'] for _, data in polars])
+    file_index = np.repeat(np.arange(len(polars)), [len(data) for _, data in polars])
+
+    with span('induced_drag.fit', len(polars)):
+        e, k, rms, n = fit_oswald(cl, cdi, file_index, geometry[:, 2])
+    return pd.DataFrame({
+        'file': [os.path.basename(file) for file, _ in polars],
+        'plane': [data.meta.get('Plane name', '') for _, data in polars],
+        'polar': [data.meta.get('Polar name', '') for _, data in polars],
+        'span_mm': geometry[:, 0],
+        'area_mm2': geometry[:, 1],
+        'AR': geometry[:, 2],
+        'k': k,
+        'e': e,
+        'rms_CDi': rms,
+        'points': n,
+    })
+
+
+def plot_induced_drag(file_path, e=1):
+    """
+    Compares the XFLR5 induced drag of one polar with CL² / (pi AR e).
+    """
+    # Only the plot needs matplotlib, the batch fit runs without it
+    import matplotlib.pyplot as plt
+
+    # Read the file and keep alpha, CL and CDi
+    data = read_xflr5(file_path)
+    df = pd.DataFrame({"alpha": data["alpha"], "CL": data["CL"], "CDi": data["CDi"]})
+
+    # Display the table
+    print(df)
+
+    #CDi calculated
+    _, _, AR = wing_geometry(data.meta)
+    CDi_calc = df["CL"]**2 / (math.pi * AR * e)
+
+    # Plot alpha vs CL
+    plt.figure(figsize=(8, 6))
+    plt.plot(df["alpha"], CDi_calc, marker='o', linestyle='-', color='b', label='CD_calc vs alpha')
+    plt.plot(df["alpha"], df["CDi"], marker='^', linestyle='-', color='r', label='CDi vs alpha')
+    plt.title("Alpha vs CDi", fontsize=14)
+    plt.xlabel("Alpha (degrees)", fontsize=12)
+    plt.ylabel("CL (Lift Coefficient)", fontsize=12)
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(fontsize=10)
+    plt.show()
+
+    '''
+    # Save the table to a CSV (optional)
+    output_path = 'alpha_cl_cdi_values.csv'
+    df.to_csv(output_path, index=False)
+    print(f"Data saved to {output_path}")
+    '''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Induced drag of XFLR5 wing polars.")
+    parser.add_argument('--file', default=os.path.join(HERE, 'xflr5_data', '3d Wing analyses_T1-22_6 m_s-VLM1.txt'),
+                        help="polar to plot against CL² / (pi AR e)")
+    parser.add_argument('--e', type=float, default=1, help="Oswald efficiency of the plotted estimate")
+    parser.add_argument('--batch', metavar='FOLDER', help="fit e for every polar of a folder instead of plotting one")
+    parser.add_argument('--pattern', default="*.txt")
+    parser.add_argument('--span', type=float, default=SPAN_MM, help="span in mm when a header has none")
+    parser.add_argument('--area', type=float, default=AREA_MM2, help="wing area in mm² when a header has none")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=os.path.join(HERE, 'induced_drag_summary.csv'))
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        files = sorted(glob.glob(os.path.join(args.batch, args.pattern)))
+        summary = induced_drag_summary(files, args.span, args.area, args.workers)
+        with span('induced_drag.export', 1):
+            summary.to_csv(args.output, index=False)
+        print(summary[['polar', 'AR', 'e', 'rms_CDi']].to_string(index=False))
+        print(f"Summary of {len(summary)} polars written to {args.output}")
+    else:
+        plot_induced_drag(args.file, args.e)
+
+
+if __name__ == "__main__":
+    main()
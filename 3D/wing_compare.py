@@ -0,0 +1,182 @@
+#compares every XFLR5 wing analysis (LLT, VLM1/VLM2, Panel, viscous and inviscid) in one pass
+
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Make the shared modules in the repository root importable
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from instrumentation import span
+from output_profiles import PROFILES, markevery, save_figure
+from parallel_loader import load_files
+from polar_features import lift_slopes
+from polar_store import nearest_indices
+from xflr5_parser import POLAR_3D, read_xflr5
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+QUANTITIES = ('CL', 'CD', 'CDi')
+
+
+def load_analyses(folder, pattern="*.txt"):
+    """
+    Reads every wing polar of a folder once.
+
+    Returns:
+        dict: analysis name (e.g. 'VLM1-Inviscid') -> XFLR5Data, sorted by name.
+    """
+    files = sorted(glob.glob(os.path.join(folder, pattern)))
+    analyses = {}
+    for file, data in zip(files, load_files(files, read_xflr5)):
+        if data.kind != POLAR_3D:
+            continue
+        name = data.meta.get('analysis') or os.path.splitext(os.path.basename(file))[0]
+        analyses[name] = data
+    return dict(sorted(analyses.items()))
+
+
+def align(analyses, quantities=QUANTITIES, tolerance=1e-6):
+    """
+    Puts all analyses on one shared alpha axis.
+
+    Returns:
+        tuple: (alpha, methods, blocks) where blocks maps every quantity to an
+        (alphas x methods) array, NaN where a method has no point at that alpha.
+    """
+    methods = list(analyses)
+    alpha = np.unique(np.concatenate([analyses[m]['alpha'] for m in methods]))
+    blocks = {q: np.full((len(alpha), len(methods)), np.nan) for q in quantities}
+    for j, method in enumerate(methods):
+        data = analyses[method]
+        order = np.argsort(data['alpha'])
+        index = nearest_indices(data['alpha'][order], alpha, tolerance)
+        found = index >= 0
+        for q in quantities:
+            blocks[q][found, j] = data[q][order][index[found]]
+    return alpha, methods, blocks
+
+
+def pairwise_differences(block):
+    """
+    Differences between all method pairs: result[:, i, j] = block[:, i] - block[:, j].
+    """
+    return block[:, :, np.newaxis] - block[:, np.newaxis, :]
+
+
+def compare(analyses, alpha_range=(-5.0, 5.0)):
+    """
+    Runs the full comparison over the aligned block.
+
+    Returns:
+        dict: 'alpha', 'methods', 'blocks', 'differences' (quantity ->
+        alphas x methods x methods), 'rms' (quantity -> methods x methods RMS
+        difference over the shared alphas) and 'slopes' (per degree).
+    """
+    alpha, methods, blocks = align(analyses)
+    differences = {q: pairwise_differences(block) for q, block in blocks.items()}
+    rms = {q: np.sqrt(np.nanmean(d**2, axis=0)) for q, d in differences.items()}
+    return {
+        'alpha': alpha,
+        'methods': methods,
+        'blocks': blocks,
+        'differences': differences,
+        'rms': rms,
+        'slopes': lift_slopes(alpha, blocks['CL'], alpha_range)[0],
+    }
+
+
+def export(comparison, output_folder):
+    """
+    Writes the aligned curves, the lift slopes and the RMS difference matrices as CSV.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    methods = comparison['methods']
+
+    curves = pd.DataFrame({'alpha': comparison['alpha']})
+    for q, block in comparison['blocks'].items():
+        for j, method in enumerate(methods):
+            curves[f'{q}_{method}'] = block[:, j]
+    curves.to_csv(os.path.join(output_folder, 'curves.csv'), index=False)
+
+    slopes = comparison['slopes']
+    pd.DataFrame({'method': methods, 'CL_alpha_per_deg': slopes,
+                  'CL_alpha_per_rad': np.degrees(slopes)}).to_csv(
+        os.path.join(output_folder, 'lift_slopes.csv'), index=False)
+
+    for q, rms in comparison['rms'].items():
+        pd.DataFrame(rms, index=methods, columns=methods).to_csv(
+            os.path.join(output_folder, f'rms_difference_{q}.csv'))
+
+
+def render(comparison, output_folder, profile=None):
+    """
+    Draws all methods in one figure per batch: CL, CD and CDi against alpha, plus the CL RMS matrix.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    os.makedirs(output_folder, exist_ok=True)
+    alpha, methods = comparison['alpha'], comparison['methods']
+
+    figure = Figure(figsize=(15, 5))
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(1, len(QUANTITIES))
+    for ax, q in zip(axes, QUANTITIES):
+        block = comparison['blocks'][q]
+        for j, method in enumerate(methods):
+            valid = ~np.isnan(block[:, j])
+            ax.plot(alpha[valid], block[valid, j], 'o-', markersize=3, label=method,
+                    markevery=markevery(valid.sum(), profile))
+        ax.set_xlabel(r'$\alpha$ (deg)')
+        ax.set_ylabel(f'${q[0]}_{{{q[1:]}}}$')
+        ax.grid(True, linestyle='-')
+    axes[0].legend(fontsize=8)
+    figure.tight_layout()
+    save_figure(figure, output_folder, 'methods_comparison', profile)
+
+    figure = Figure(figsize=(7, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+    image = ax.imshow(comparison['rms']['CL'], cmap='viridis')
+    ax.set_xticks(range(len(methods)), methods, rotation=45, ha='right')
+    ax.set_yticks(range(len(methods)), methods)
+    ax.set_title('RMS difference in $C_L$')
+    figure.colorbar(image, ax=ax)
+    figure.tight_layout()
+    save_figure(figure, output_folder, 'rms_difference_CL', profile)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare all XFLR5 wing analyses of a folder.")
+    parser.add_argument('--folder', default=os.path.join(HERE, 'xflr5_data'))
+    parser.add_argument('--output', default=os.path.join(HERE, 'comparison'))
+    parser.add_argument('--alpha-min', type=float, default=-5.0, help="start of the linear range for the lift slope")
+    parser.add_argument('--alpha-max', type=float, default=5.0, help="end of the linear range for the lift slope")
+    parser.add_argument('--output-profile', choices=PROFILES, default=None,
+                        help="dpi and format of the saved plots (default: report, PNG)")
+    parser.add_argument('--no-plots', action='store_true', help="only export the CSV tables")
+    args = parser.parse_args(argv)
+
+    with span('wing_compare.load') as stage:
+        analyses = load_analyses(args.folder)
+        stage.count = len(analyses)
+    with span('wing_compare.compare', len(analyses)):
+        comparison = compare(analyses, (args.alpha_min, args.alpha_max))
+    with span('wing_compare.export', len(analyses)):
+        export(comparison, args.output)
+    if not args.no_plots:
+        with span('wing_compare.render', 2):
+            render(comparison, args.output, args.output_profile)
+
+    for method, slope in zip(comparison['methods'], comparison['slopes']):
+        print(f"{method:>16}: dCL/dalpha = {slope:.4f} /deg")
+    print(f"Comparison of {len(analyses)} analyses written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
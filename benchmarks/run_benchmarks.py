@@ -0,0 +1,217 @@
+#times every stage of the Cp and XFLR5 pipelines on synthetic data and writes the results as JSON
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+# Figures are rendered headless
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path[:0] = [HERE, ROOT, os.path.join(ROOT, '2d', 'Cp')]
+
+import numpy as np
+import pandas as pd
+
+import synthetic
+from batch_render import available_aoas, render_batch
+from cp_engine import cp_frame, read_raw_file, reduce_cp
+from cp_getter import read_coordinates_file
+from cp_grapher import parse_xflr5_file
+from cp_plotter import read_experiment_file
+from data_cache import cached_frame
+from parallel_loader import load_directory, load_files
+from polar_store import match_alphas
+from tap_layout import layout_from_coordinates
+from xflr5_parser import read_xflr5
+
+COORDINATES = os.path.join(ROOT, '2d', 'Cp', 'SLT_practical_coordinates.xlsx')
+
+
+def measure(function, repeat=3):
+    """
+    Calls function repeat times.
+
+    Returns:
+        tuple: (best seconds, median seconds, result of the last call)
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times), result
+
+
+class Recorder:
+    """
+    Collects one record per stage and size and prints it as it goes.
+    """
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.records = []
+
+    def run(self, stage, size, unit, function, repeat=None):
+        best, median, result = measure(function, repeat or self.repeat)
+        per_second = size / best if best > 0 else None
+        self.records.append({
+            'stage': stage,
+            'size': size,
+            'unit': unit,
+            'best_s': best,
+            'median_s': median,
+            'per_second': per_second,
+        })
+        rate = f"{per_second:12.0f}" if per_second is not None else f"{'-':>12}"
+        print(f"{stage:>22} {size:>9} {unit:<8} {best * 1000:10.2f} ms  {rate} {unit}/s")
+        return result
+
+
+def bench_raw(recorder, folder, sizes, max_export):
+    layout = recorder.run('coordinates_load', 1, 'files',
+                          lambda: layout_from_coordinates(read_coordinates_file(COORDINATES)))
+
+    for n_rows in sizes:
+        raw_path = synthetic.write_raw(os.path.join(folder, f'raw_{n_rows}.txt'), n_rows)
+        cache_dir = os.path.join(folder, f'cache_{n_rows}')
+
+        raw_data = recorder.run('raw_parse', n_rows, 'rows', lambda: read_raw_file(raw_path))
+        # First call fills the cache, the timed calls read the binary copy
+        cached_frame(raw_path, read_raw_file, 'raw', cache_dir)
+        recorder.run('raw_cached_load', n_rows, 'rows',
+                     lambda: cached_frame(raw_path, read_raw_file, 'raw', cache_dir))
+
+        raw_values = raw_data.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        cp_runs = recorder.run('cp_reduction', n_rows, 'rows', lambda: reduce_cp(raw_values, layout))
+
+        # Per-run views and CSV export as plot_cp does them, limited to max_export runs
+        n_export = min(n_rows, max_export)
+        recorder.run('cp_frame', n_export, 'runs',
+                     lambda: [cp_frame(cp_runs, i) for i in range(n_export)], repeat=1)
+        export_folder = os.path.join(folder, f'export_{n_rows}')
+        os.makedirs(export_folder, exist_ok=True)
+        recorder.run('csv_export', n_export, 'files', lambda: [
+            cp_frame(cp_runs, i).to_csv(os.path.join(export_folder, f'{i}.csv'), index=False)
+            for i in range(n_export)], repeat=1)
+        os.remove(raw_path)
+
+
+def bench_files(recorder, folder, file_counts, workers):
+    for n_files in file_counts:
+        alphas = synthetic.sweep(n_files)
+        xflr5_folder = synthetic.write_xflr5_cp_folder(os.path.join(folder, f'xflr5_{n_files}'), alphas)
+        experiment_folder = synthetic.write_real_results_folder(os.path.join(folder, f'real_{n_files}'), alphas)
+        files = [os.path.join(xflr5_folder, f'{alpha}.txt') for alpha in alphas]
+
+        recorder.run('xflr5_parse', n_files, 'files', lambda: load_files(files, read_xflr5, workers, 'serial'))
+        # The first pass of parse_xflr5_file fills the cache, the timed one reads it
+        recorder.run('xflr5_parse_cold', n_files, 'files',
+                     lambda: load_directory(xflr5_folder, '*.txt', parse_xflr5_file, workers), repeat=1)
+        recorder.run('xflr5_parse_cached', n_files, 'files',
+                     lambda: load_directory(xflr5_folder, '*.txt', parse_xflr5_file, workers))
+        experiment_files = [os.path.join(experiment_folder, f'{alpha}.csv') for alpha in alphas]
+        recorder.run('experiment_parse', n_files, 'files',
+                     lambda: load_files(experiment_files, read_experiment_file, workers))
+
+        # Shift one side slightly, the way measured AoAs differ from the XFLR5 sweep
+        measured = np.asarray(alphas) + np.random.default_rng(0).uniform(-0.02, 0.02, n_files)
+        recorder.run('alpha_matching', n_files, 'alphas', lambda: match_alphas(alphas, measured))
+        recorder.run('available_aoas', n_files, 'files', lambda: available_aoas(xflr5_folder, experiment_folder))
+
+    polar_path = synthetic.write_xflr5_polar(os.path.join(folder, 'polar.txt'), np.arange(-5, 15, 0.01))
+    recorder.run('xflr5_polar_parse', 1, 'files', lambda: read_xflr5(polar_path))
+
+
+def bench_render(recorder, folder, n_figures, dpi, workers):
+    alphas = synthetic.sweep(n_figures)
+    xflr5_folder = synthetic.write_xflr5_cp_folder(os.path.join(folder, 'render_xflr5'), alphas)
+    experiment_folder = synthetic.write_real_results_folder(os.path.join(folder, 'render_real'), alphas)
+    output_folder = os.path.join(folder, 'render_out')
+    for style in ('plotter', 'grapher'):
+        recorder.run(f'render_{style}', n_figures, 'figures',
+                     lambda: render_batch(xflr5_folder, experiment_folder, output_folder, style, dpi, workers),
+                     repeat=1)
+
+
+def compare(records, baseline_path, max_slowdown):
+    """
+    Prints the speed of every stage relative to a baseline JSON file.
+
+    Returns:
+        list: (stage, size, ratio) of the stages that got slower than max_slowdown.
+    """
+    with open(baseline_path, 'r') as file:
+        baseline = {(r['stage'], r['size']): r for r in json.load(file)['results']}
+    slower = []
+    print(f"\nCompared with {baseline_path} (ratio > 1 is slower):")
+    for record in records:
+        old = baseline.get((record['stage'], record['size']))
+        if old is None:
+            continue
+        ratio = record['best_s'] / old['best_s']
+        flag = '  <-- slower' if ratio > max_slowdown else ''
+        print(f"{record['stage']:>22} {record['size']:>9} {ratio:8.2f}{flag}")
+        if ratio > max_slowdown:
+            slower.append((record['stage'], record['size'], ratio))
+    return slower
+
+
+def environment():
+    import matplotlib
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="raw_2D.txt rows to generate (up to 1000000)")
+    parser.add_argument('--files', type=int, nargs='+', default=[100, 1000],
+                        help="number of XFLR5 and real_results files per folder")
+    parser.add_argument('--figures', type=int, default=20, help="figures per rendering benchmark")
+    parser.add_argument('--dpi', type=int, default=100, help="dpi of the rendering benchmark")
+    parser.add_argument('--max-export', type=int, default=1000, help="most runs exported to CSV per size")
+    parser.add_argument('--repeat', type=int, default=3, help="timed calls per stage, the best one is kept")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--stages', nargs='+', choices=('raw', 'files', 'render'), default=['raw', 'files', 'render'])
+    parser.add_argument('--output', default=os.path.join(HERE, 'results.json'))
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--max-slowdown', type=float, default=1.25,
+                        help="with --baseline, exit with 1 when a stage is this much slower")
+    args = parser.parse_args(argv)
+
+    recorder = Recorder(args.repeat)
+    with tempfile.TemporaryDirectory() as folder:
+        if 'raw' in args.stages:
+            bench_raw(recorder, folder, args.sizes, args.max_export)
+        if 'files' in args.stages:
+            bench_files(recorder, folder, args.files, args.workers)
+        if 'render' in args.stages:
+            bench_render(recorder, folder, args.figures, args.dpi, args.workers)
+
+    with open(args.output, 'w') as file:
+        json.dump({'environment': environment(), 'settings': vars(args), 'results': recorder.records},
+                  file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline and compare(recorder.records, args.baseline, args.max_slowdown):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#writes synthetic tunnel logs, XFLR5 files and real_results folders of any size for the benchmarks
+
+import os
+
+import numpy as np
+
+# Columns in front of P001 in raw_2D.txt
+RAW_NAMES = ['Run_nr', 'Time', 'Alpha', 'Delta_Pb', 'P_bar', 'T', 'rpm', 'rho']
+RAW_UNITS = ['/', 'H:M:S', 'degrees', 'Pa', 'Pa', 'degr._C', '1/min', 'kg/m^3']
+N_TAPS = 113
+
+
+def _cp_shape(x, alpha):
+    """
+    Rough thin-airfoil Cp of the upper and lower surface, good enough to give plausible numbers.
+
+    Parameters:
+        x (array): Chord positions (points).
+        alpha (array): Angles of attack in degrees (cases).
+
+    Returns:
+        tuple: (cp_upper, cp_lower), each cases x points.
+    """
+    a = np.radians(np.asarray(alpha, dtype=float))[:, np.newaxis]
+    x = np.clip(np.asarray(x, dtype=float), 0.02, 1)[np.newaxis, :]
+    loading = 4 * (a + 0.05) * np.sqrt((1 - x) / x)
+    thickness = 0.3 * (1 - 2 * x)
+    return -thickness - loading / 2, -thickness + loading / 2
+
+
+def write_raw(path, n_rows, n_taps=N_TAPS, seed=0, chunk_rows=50000):
+    """
+    Writes a raw_2D.txt look-alike with n_rows runs and n_taps pressure columns.
+
+    The airfoil taps follow a thin-airfoil Cp times the dynamic pressure, the
+    other taps hold noise around the freestream, so the result passes through
+    the same reduction as a real log.
+    """
+    rng = np.random.default_rng(seed)
+    names = RAW_NAMES + [f'P{str(i).zfill(3)}' for i in range(1, n_taps + 1)]
+    units = RAW_UNITS + ['Pa'] * n_taps
+    # Run_nr, H, M, S, then Alpha ... rho and the taps
+    line_format = '%8d\t %02d:%02d:%02d' + '\t%8.3f' * 6 + '\t%8.2f' * n_taps
+    x = np.linspace(0, 1, 25)
+
+    with open(path, 'w') as file:
+        file.write('\t'.join(f'{n:>8}' for n in names) + '\n')
+        file.write('\t'.join(f'{u:>8}' for u in units) + '\n')
+        for start in range(0, n_rows, chunk_rows):
+            n = min(chunk_rows, n_rows - start)
+            run = np.arange(start, start + n) + 1
+            seconds = 12 * 3600 + run * 130
+            alpha = np.round(rng.uniform(-5, 15, n), 2)
+            delta_pb = rng.normal(153, 1, n)
+            q = 0.211 + 1.9284 * delta_pb + 1.8793e-4 * delta_pb**2
+
+            taps = rng.normal(0, 2, (n, n_taps))
+            cp_upper, cp_lower = _cp_shape(x, alpha)
+            taps[:, :25] += cp_upper * q[:, np.newaxis]
+            taps[:, 25:49] += cp_lower[:, 1:] * q[:, np.newaxis]
+
+            block = np.column_stack([
+                run, seconds // 3600 % 24, seconds // 60 % 60, seconds % 60,
+                alpha, delta_pb, rng.normal(1009, 0.2, n), rng.normal(22.4, 0.1, n),
+                rng.normal(950, 0.5, n), np.full(n, 1.19), taps,
+            ])
+            np.savetxt(file, block, fmt=line_format)
+    return path
+
+
+def xflr5_cp_text(alpha, n_points=160):
+    """
+    Text of an XFLR5 Cp export at one AoA, in the format of 2d/Cp/xflr5_results.
+    """
+    beta = np.linspace(0, np.pi, n_points // 2)
+    x = (1 - np.cos(beta)) / 2
+    cp_upper, cp_lower = _cp_shape(x, [alpha])
+    # XFLR5 runs from the upper trailing edge around the nose to the lower trailing edge
+    x_all = np.concatenate([x[::-1], x[1:]])
+    cpi = np.concatenate([cp_upper[0, ::-1], cp_lower[0, 1:]])
+    cpv = 0.9 * cpi
+    lines = ['xflr5 v6.61', 'SD6060-104-88', 'T1_Re0.231_M0.00_N9.0',
+             f'Alpha = {alpha:5.1f},  Re =   231000,  Ma = 0.0000,  ACrit = 9.0 ', '',
+             '   x        Cpi      Cpv        Qi        Qv']
+    qi = np.sqrt(np.clip(1 - cpi, 0, None))
+    qv = np.sqrt(np.clip(1 - cpv, 0, None))
+    for row in zip(x_all, cpi, cpv, qi, qv):
+        lines.append(' %6.4f  %8.3f  %8.3f  %8.3f  %8.3f' % row)
+    return '\n'.join(lines) + '\n'
+
+
+def write_xflr5_cp_folder(folder, alphas, n_points=160):
+    """
+    Writes one XFLR5 Cp file per AoA, named like 2d/Cp/xflr5_results ('2.5.txt').
+    """
+    os.makedirs(folder, exist_ok=True)
+    for alpha in alphas:
+        with open(os.path.join(folder, f'{alpha}.txt'), 'w') as file:
+            file.write(xflr5_cp_text(alpha, n_points))
+    return folder
+
+
+def write_xflr5_polar(path, alphas):
+    """
+    Writes an XFLR5 2D polar export in the format of 2d/Forces.
+    """
+    alphas = np.asarray(alphas, dtype=float)
+    a = np.radians(alphas)
+    cl = 2 * np.pi * (a + 0.05)
+    cd = 0.01 + 0.02 * cl**2
+    n = len(alphas)
+    columns = np.column_stack([alphas, cl, cd, 0.6 * cd, np.full(n, -0.05), np.full(n, 0.95),
+                               np.full(n, 0.02), -1 - cl, np.zeros(n), np.zeros(n), np.zeros(n),
+                               np.full(n, 0.1)])
+    header = ['xflr5 v6.61', '', ' Calculated polar for: SD6060-104-88', '',
+              ' 1 1 Reynolds number fixed          Mach number fixed         ', '',
+              ' xtrf =   1.000 (top)        1.000 (bottom)',
+              ' Mach =   0.000     Re =     0.231 e 6     Ncrit =   9.000', '',
+              '  alpha     CL        CD       CDp       Cm    Top Xtr Bot Xtr   Cpmin    Chinge    XCp    ',
+              ' ------- -------- --------- --------- -------- ------- ------- -------- --------- ---------']
+    with open(path, 'w') as file:
+        file.write('\n'.join(header) + '\n')
+        np.savetxt(file, columns, fmt=' %7.3f %8.4f %9.5f %9.5f %8.4f %7.4f %7.4f %8.4f %9.4f %9.4f %9.4f %9.4f')
+    return path
+
+
+def write_real_results_folder(folder, alphas):
+    """
+    Writes one measured Cp CSV per AoA in the cp_engine.cp_frame layout (Point, x/c, Cp, Surface).
+    """
+    os.makedirs(folder, exist_ok=True)
+    x = np.linspace(0, 1, 25)
+    cp_upper, cp_lower = _cp_shape(x, alphas)
+    points = [f'P{str(i).zfill(3)}' for i in range(1, 50)]
+    x_all = np.concatenate([x, x[1:]])
+    surfaces = ['Upper'] * 25 + ['Lower'] * 24
+    for alpha, upper, lower in zip(alphas, cp_upper, cp_lower):
+        cp = np.concatenate([upper, lower[1:]])
+        lines = ['Point,x/c,Cp,Surface']
+        lines += [f'{p},{xc},{c},{s}' for p, xc, c, s in zip(points, x_all, cp, surfaces)]
+        with open(os.path.join(folder, f'{alpha}.csv'), 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+    return folder
+
+
+def sweep(n, start=-5.0, step=0.25):
+    """
+    n distinct AoAs, rounded like the file names of a real sweep.
+    """
+    return [round(start + i * step, 2) for i in range(n)]
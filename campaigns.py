@@ -0,0 +1,259 @@
+#runs the Cp reduction, statistics, XFLR5 residuals and plots of many test campaigns from one config file
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# The 2D Cp scripts import their siblings, so their folder has to be importable
+CP_FOLDER = os.path.join(HERE, '2d', 'Cp')
+
+CONFIG_NAME = 'campaigns.json'
+# Every step reads what the steps before it wrote, so they always run in this order
+STEPS = ('reduce', 'statistics', 'residuals', 'plots')
+LOG_NAME = 'campaign.log'
+
+
+def resolve_path(value, base):
+    """
+    Turns a config path into a path of this OS.
+
+    Config files are shared between Windows and Linux machines, so both /
+    and \\ separate folders. Relative paths are relative to the config file.
+
+    Parameters:
+        value (str): Path as written in the config.
+        base (str): Folder of the config file.
+
+    Returns:
+        str: Normalized absolute path.
+    """
+    parts = [part for part in re.split(r'[\\/]+', value) if part]
+    if re.match(r'^[A-Za-z]:$', parts[0] if parts else ''):
+        # Windows drive letter: 'C:' alone would be relative to the current folder of that drive
+        parts[0] += os.sep
+    elif value.startswith(('/', '\\')):
+        parts.insert(0, os.sep)
+    else:
+        parts.insert(0, base)
+    return os.path.normpath(os.path.join(*parts))
+
+
+def _campaign(entry, base, output_root, default_steps):
+    # One campaign of the config with all its paths resolved
+    for key in ('name', 'raw', 'coordinates'):
+        if key not in entry:
+            raise ValueError(f"Campaign {entry.get('name', entry)!r} has no '{key}'")
+    xflr5 = entry.get('xflr5', [])
+    if isinstance(xflr5, str):
+        xflr5 = [xflr5]
+    steps = entry.get('steps', default_steps)
+    unknown = [step for step in steps if step not in STEPS]
+    if unknown:
+        raise ValueError(f"Campaign {entry['name']!r} has unknown steps {unknown}, choose from {list(STEPS)}")
+    output = entry.get('output')
+    return {
+        'name': entry['name'],
+        'raw': resolve_path(entry['raw'], base),
+        'coordinates': resolve_path(entry['coordinates'], base),
+        'xflr5': [resolve_path(folder, base) for folder in xflr5],
+        'output': resolve_path(output, base) if output else os.path.join(output_root, entry['name']),
+        'steps': [step for step in STEPS if step in steps],
+    }
+
+
+def _discover(entry, base):
+    # One entry per raw file matching the 'discover' pattern; '{name}' in the
+    # other fields becomes the name of the folder the raw file is in
+    pattern = resolve_path(entry['discover'], base)
+    entries = []
+    for raw in sorted(glob.glob(pattern)):
+        name = os.path.basename(os.path.dirname(raw))
+        found = {key: value for key, value in entry.items() if key != 'discover'}
+        for key, value in found.items():
+            if isinstance(value, str):
+                found[key] = value.replace('{name}', name)
+            elif isinstance(value, list):
+                found[key] = [item.replace('{name}', name) if isinstance(item, str) else item for item in value]
+        found['name'] = found.get('name', name)
+        found['raw'] = raw
+        entries.append(found)
+    if not entries:
+        print(f"No raw files match {pattern}")
+    return entries
+
+
+def load_campaigns(config_path):
+    """
+    Reads a campaign config.
+
+    The config is a JSON object with a 'campaigns' list and an optional
+    'output_root' (default 'output') and 'steps' (default all of STEPS).
+    Every campaign has a 'name', the 'raw' log, the tap 'coordinates'
+    workbook, a list of 'xflr5' Cp folders, and optionally its own 'output'
+    folder (default output_root/name) and 'steps'. An entry with a
+    'discover' glob pattern instead of 'raw' becomes one campaign per
+    matching raw file, named after its folder.
+
+    Returns:
+        list: Campaign dicts with absolute paths, in config order.
+    """
+    config_path = os.path.abspath(config_path)
+    base = os.path.dirname(config_path)
+    with open(config_path) as file:
+        config = json.load(file)
+    if not isinstance(config.get('campaigns'), list):
+        raise ValueError(f"{config_path} has no 'campaigns' list")
+    output_root = resolve_path(config.get('output_root', 'output'), base)
+    default_steps = config.get('steps', list(STEPS))
+
+    campaigns = []
+    for entry in config['campaigns']:
+        for found in (_discover(entry, base) if 'discover' in entry else [entry]):
+            campaigns.append(_campaign(found, base, output_root, default_steps))
+    names = [campaign['name'] for campaign in campaigns]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Campaign names must be unique, repeated: {duplicates}")
+    return campaigns
+
+
+def _run_step(step, campaign):
+    # Imported here, so every worker process only loads the scripts it uses
+    if CP_FOLDER not in sys.path:
+        sys.path.insert(0, CP_FOLDER)
+    output = campaign['output']
+    store = os.path.join(output, 'cp_store')
+
+    if step == 'reduce':
+        import cp_getter
+        cp_getter.export_all(cp_getter.load_cp_runs(campaign['raw'], campaign['coordinates']), store)
+    elif step == 'statistics':
+        import cp_uncertainty
+        cp_uncertainty.main(['--source', store, '--output', os.path.join(output, 'pressure_polar_statistics.csv')])
+    elif step == 'residuals':
+        import cp_resample
+        for folder in campaign['xflr5']:
+            cp_resample.main(['--source', store, '--xflr5', folder,
+                              '--output', os.path.join(output, 'residuals', os.path.basename(folder))])
+    elif step == 'plots':
+        from batch_render import render_batch
+        for folder in campaign['xflr5']:
+            # One process per campaign already, so the plots render in it
+            saved = render_batch(folder, store, os.path.join(output, 'plots', os.path.basename(folder)),
+                                 'grapher', workers=1)
+            print(f"Saved {len(saved)} plots for {folder}")
+
+
+def run_campaign(campaign):
+    """
+    Runs the steps of one campaign and times them.
+
+    The output of the scripts goes to campaign.log in the output folder. A
+    failing step stops the campaign, since the later steps read its output.
+
+    Returns:
+        dict: 'name', 'steps' as a list of (step, seconds, error or None) and 'seconds' in total.
+    """
+    from instrumentation import span
+
+    os.makedirs(campaign['output'], exist_ok=True)
+    timings = []
+    start = time.perf_counter()
+    with open(os.path.join(campaign['output'], LOG_NAME), 'w') as log, contextlib.redirect_stdout(log):
+        for step in campaign['steps']:
+            step_start = time.perf_counter()
+            error = None
+            try:
+                with span(f"campaigns.{step}"):
+                    _run_step(step, campaign)
+            except (Exception, SystemExit):
+                # The scripts exit() on unreadable inputs; that must not end the whole batch
+                error = traceback.format_exc()
+                print(error)
+            timings.append((step, time.perf_counter() - step_start, error))
+            if error:
+                break
+    return {'name': campaign['name'], 'steps': timings, 'seconds': time.perf_counter() - start}
+
+
+def _report_line(report):
+    steps = "  ".join(f"{step} {seconds:.1f}s" + (" FAILED" if error else "")
+                      for step, seconds, error in report['steps'])
+    return f"{report['name']:<24} {report['seconds']:7.1f}s  {steps}"
+
+
+def run_all(campaigns, workers=None):
+    """
+    Runs many campaigns side by side in a process pool, see run_campaign.
+
+    Every campaign is printed with its step timings as soon as it finishes.
+
+    Parameters:
+        campaigns (list): Output of load_campaigns.
+        workers (int): Pool size, defaults to the number of CPUs; 1 runs them one by one in this process.
+
+    Returns:
+        list: Reports of run_campaign, in the order of campaigns.
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(campaigns), 1))
+    reports = {}
+    if workers <= 1:
+        for campaign in campaigns:
+            reports[campaign['name']] = run_campaign(campaign)
+            print(_report_line(reports[campaign['name']]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_campaign, campaign): campaign for campaign in campaigns}
+            for future in as_completed(futures):
+                report = future.result()
+                reports[report['name']] = report
+                print(_report_line(report))
+    return [reports[campaign['name']] for campaign in campaigns]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Reduce, average, score and plot many wind tunnel campaigns from one config file.")
+    parser.add_argument('--config', default=os.path.join(HERE, CONFIG_NAME), help="campaign config JSON")
+    parser.add_argument('--workers', type=int, default=None, help="campaigns processed at the same time")
+    parser.add_argument('--only', action='append', metavar='NAME', help="run only this campaign (repeatable)")
+    parser.add_argument('--steps', nargs='+', choices=STEPS, default=None,
+                        help="run only these steps, instead of the steps of the config")
+    parser.add_argument('--list', action='store_true', help="print the campaigns and their paths without running them")
+    args = parser.parse_args(argv)
+
+    campaigns = load_campaigns(args.config)
+    if args.only:
+        missing = sorted(set(args.only) - {campaign['name'] for campaign in campaigns})
+        if missing:
+            parser.error(f"unknown campaigns {missing}")
+        campaigns = [campaign for campaign in campaigns if campaign['name'] in args.only]
+    if args.steps:
+        for campaign in campaigns:
+            campaign['steps'] = [step for step in STEPS if step in args.steps]
+
+    if args.list:
+        for campaign in campaigns:
+            print(campaign['name'])
+            for key in ('raw', 'coordinates', 'xflr5', 'output', 'steps'):
+                print(f"    {key:<12} {campaign[key]}")
+        return
+
+    start = time.perf_counter()
+    reports = run_all(campaigns, args.workers)
+    failed = [report['name'] for report in reports if report['steps'] and report['steps'][-1][2]]
+    print(f"{len(reports)} campaigns in {time.perf_counter() - start:.1f}s"
+          + (f", failed: {', '.join(failed)} (see {LOG_NAME} in their output folder)" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+#local web server to browse the Cp runs and polars of a campaign, with the data parsed once for all users
+
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CP_FOLDER = os.path.join(HERE, '2d', 'Cp')
+FORCES_FOLDER = os.path.join(HERE, '2d', 'Forces')
+WING_FOLDER = os.path.join(HERE, '3D', 'xflr5_data')
+
+# The Cp pipeline modules live next to the Cp scripts
+sys.path.insert(0, CP_FOLDER)
+
+from batch_render import STYLES, CpFigure
+from cp_engine import cp_frame, load_raw_values, reduce_cp
+from cp_store import CpStore, is_cp_store
+from instrumentation import span
+from output_profiles import get_profile
+from parallel_loader import load_directory, load_files
+from polar_features import load_polar, polar_features, resample
+from polar_store import nearest_indices
+from tap_layout import load_tap_layout
+from xflr5_parser import read_xflr5_frame
+
+# Most points per line sent to the browser; plots stay readable and responses small
+MAX_POINTS = 400
+# Rendered figures kept in memory, shared by every user
+CACHE_SIZE = 128
+
+
+def _read_xflr5_cp(file_path):
+    data = read_xflr5_frame(file_path)
+    return data.attrs['Alpha'], data
+
+
+def _read_result_csv(file_path):
+    return float(os.path.splitext(os.path.basename(file_path))[0]), pd.read_csv(file_path)
+
+
+def _read_polar(file_path):
+    # A CSV in the polar folders that is not a polar (no CL or drag column) is skipped, not fatal
+    try:
+        return load_polar(file_path)
+    except (KeyError, ValueError) as error:
+        print(f"Skipping {file_path}: not a polar ({error})")
+        return None
+
+
+def downsample(x, y, max_points=MAX_POINTS):
+    """
+    Keeps at most max_points evenly spread points of a line, always with both ends.
+
+    Returns:
+        tuple: (x, y) as lists, NaN replaced by None so they serialise to JSON null.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if max_points and len(x) > max_points:
+        keep = np.unique(np.linspace(0, len(x) - 1, max_points).round().astype(int))
+        x, y = x[keep], y[keep]
+    return _to_list(x), _to_list(y)
+
+
+def _to_list(values):
+    values = np.asarray(values, dtype=float)
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+class Campaign:
+    """
+    Every dataset of one campaign, parsed once when the server starts.
+
+    Attributes:
+        runs (dict): reduce_cp-like output of all raw runs (Cp store or raw_2D.txt).
+        experiments (dict): alpha -> measured Cp DataFrame (latest run or real_results CSV).
+        xflr5 (dict): alpha -> XFLR5 Cp DataFrame.
+        polars (dict): name -> (alpha, CL, CD) of every 2D, 3D and experimental polar.
+        features (DataFrame): polar_features summary of the polars.
+    """
+
+    def __init__(self, cp_folder=CP_FOLDER, polar_files=None, workers=None):
+        store = os.path.join(cp_folder, 'cp_store')
+        with span('dashboard.load_runs') as stage:
+            if is_cp_store(store):
+                self.runs = CpStore(store).read()
+                self.experiments = CpStore(store).latest_frames()
+            else:
+                layout = load_tap_layout(os.path.join(cp_folder, 'SLT_practical_coordinates.xlsx'))
+                self.runs = reduce_cp(load_raw_values(os.path.join(cp_folder, 'raw_2D.txt')), layout)
+                self.experiments = load_directory(os.path.join(cp_folder, 'real_results'), "*.csv",
+                                                  _read_result_csv, workers)
+            stage.count = len(self.runs['alpha'])
+        with span('dashboard.load_xflr5') as stage:
+            self.xflr5 = load_directory(os.path.join(cp_folder, 'xflr5_results'), "*.txt", _read_xflr5_cp, workers)
+            stage.count = len(self.xflr5)
+
+        if polar_files is None:
+            polar_files = sorted(glob.glob(os.path.join(FORCES_FOLDER, '*.txt'))
+                                 + glob.glob(os.path.join(FORCES_FOLDER, '*.csv'))
+                                 + glob.glob(os.path.join(WING_FOLDER, '*.txt')))
+        with span('dashboard.load_polars', len(polar_files)):
+            names = [os.path.splitext(os.path.basename(path))[0] for path in polar_files]
+            loaded = load_files(polar_files, _read_polar, workers)
+            self.polars = {name: polar for name, polar in zip(names, loaded) if polar is not None}
+            self.features = polar_features(*resample(self.polars)) if self.polars else pd.DataFrame()
+
+        # Both dictionaries are sorted by alpha, so their keys can be searched directly
+        self._xflr5_alphas = list(self.xflr5)
+        self._experiment_alphas = list(self.experiments)
+
+    def index(self):
+        return {
+            'runs': [{'run': int(run), 'alpha': float(alpha)} for run, alpha in zip(self.runs['run'], self.runs['alpha'])],
+            'cp_alphas': sorted(set(self.experiments) | set(self.xflr5)),
+            'polars': list(self.polars),
+        }
+
+    def _nearest(self, alphas, alpha, tolerance):
+        index = nearest_indices(alphas, [alpha], tolerance)[0]
+        return None if index < 0 else alphas[index]
+
+    def cp(self, alpha, tolerance=0.05, max_points=MAX_POINTS):
+        """
+        Measured and XFLR5 Cp at the AoAs nearest to alpha, downsampled per line.
+        """
+        result = {'alpha': alpha}
+        exp_alpha = self._nearest(self._experiment_alphas, alpha, tolerance)
+        if exp_alpha is not None:
+            data = self.experiments[exp_alpha]
+            result['experiment_alpha'] = exp_alpha
+            for surface in ('Upper', 'Lower'):
+                rows = data[data['Surface'] == surface]
+                x, y = downsample(rows['x/c'], rows['Cp'], max_points)
+                result[surface.lower()] = {'x': x, 'cp': y}
+        xflr5_alpha = self._nearest(self._xflr5_alphas, alpha, tolerance)
+        if xflr5_alpha is not None:
+            data = self.xflr5[xflr5_alpha]
+            x, y = downsample(data['x'], data['Cpv'], max_points)
+            result['xflr5_alpha'] = xflr5_alpha
+            result['xflr5'] = {'x': x, 'cp': y}
+        return result
+
+    def run(self, run):
+        """
+        Cp of one raw run by its Run_nr.
+        """
+        index = np.flatnonzero(self.runs['run'] == run)
+        if not len(index):
+            return None
+        frame = cp_frame(self.runs, index[-1])
+        result = {'run': run, 'alpha': float(self.runs['alpha'][index[-1]]), 'q': float(self.runs['q'][index[-1]])}
+        for surface in ('Upper', 'Lower'):
+            rows = frame[frame['Surface'] == surface]
+            result[surface.lower()] = {'point': rows['Point'].tolist(), 'x': _to_list(rows['x/c']),
+                                       'cp': _to_list(rows['Cp'])}
+        return result
+
+    def polar(self, names, max_points=MAX_POINTS):
+        result = {}
+        for name in names:
+            if name in self.polars:
+                alpha, cl, cd = self.polars[name]
+                x, cl = downsample(alpha, cl, max_points)
+                _, cd = downsample(alpha, cd, max_points)
+                result[name] = {'alpha': x, 'CL': cl, 'CD': cd}
+        return result
+
+
+class FigureCache:
+    """
+    Least-recently-used cache of rendered PNGs, keyed by the request parameters.
+
+    Rendering holds a lock, so the shared figures are never drawn by two
+    threads at once; cache hits do not wait for it.
+    """
+
+    def __init__(self, campaign, size=CACHE_SIZE):
+        self.campaign = campaign
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.render_lock = threading.Lock()
+        self.cp_figures = {}
+        self.hits = self.misses = 0
+
+    def get(self, key, render):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        with self.render_lock:
+            # Another thread may have rendered it while this one waited
+            with self.lock:
+                if key in self.entries:
+                    self.hits += 1
+                    return self.entries[key]
+            with span('dashboard.render', 1):
+                image = render()
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = image
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return image
+
+    def cp_png(self, alpha, style='plotter', profile='preview', tolerance=0.05):
+        campaign = self.campaign
+        exp_alpha = campaign._nearest(campaign._experiment_alphas, alpha, tolerance)
+        xflr5_alpha = campaign._nearest(campaign._xflr5_alphas, alpha, tolerance)
+        if exp_alpha is None or xflr5_alpha is None:
+            return None
+
+        def render():
+            # One figure per style, re-used for every AoA like the batch renderer
+            if style not in self.cp_figures:
+                self.cp_figures[style] = CpFigure(style)
+            figure = self.cp_figures[style]
+            figure.update(xflr5_alpha, campaign.experiments[exp_alpha], campaign.xflr5[xflr5_alpha], profile)
+            return _png(figure.figure, profile)
+        # Keyed by the matched files, so nearby requested alphas share one entry
+        return self.get(('cp', exp_alpha, xflr5_alpha, style, profile), render)
+
+    def polar_png(self, names, quantity='CL', profile='preview'):
+        def render():
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            figure = Figure(figsize=(8, 6))
+            FigureCanvasAgg(figure)
+            ax = figure.add_subplot()
+            for name in names:
+                alpha, cl, cd = self.campaign.polars[name]
+                ax.plot(alpha, cl if quantity == 'CL' else cd, marker='o', markersize=3, label=name)
+            ax.set_xlabel(r'$\alpha$ (deg)')
+            ax.set_ylabel(quantity)
+            ax.grid(True)
+            ax.legend(fontsize=8)
+            return _png(figure, profile)
+        names = tuple(name for name in names if name in self.campaign.polars)
+        if not names:
+            return None
+        return self.get(('polar', names, quantity, profile), render)
+
+
+def _png(figure, profile):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=get_profile(profile)['dpi'])
+    return buffer.getvalue()
+
+
+PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Campaign dashboard</title>
+<style>body{font-family:sans-serif;margin:1em} img{max-width:48%;border:1px solid #ccc}</style></head>
+<body>
+<h2>Campaign dashboard</h2>
+<label>AoA <select id="alpha"></select></label>
+<label>Polars <select id="polars" multiple size="5"></select></label>
+<label>Quantity <select id="quantity"><option>CL</option><option>CD</option></select></label>
+<div><img id="cp"><img id="polar"></div>
+<pre id="features"></pre>
+<script>
+async function init() {
+  const index = await (await fetch('/api/index')).json();
+  const alpha = document.getElementById('alpha'), polars = document.getElementById('polars');
+  index.cp_alphas.forEach(a => alpha.add(new Option(a, a)));
+  index.polars.forEach(p => polars.add(new Option(p, p)));
+  const update = () => {
+    document.getElementById('cp').src = '/plot/cp.png?alpha=' + alpha.value;
+    const names = [...polars.selectedOptions].map(o => encodeURIComponent(o.value)).join(',');
+    if (names) document.getElementById('polar').src = '/plot/polar.png?quantity='
+      + document.getElementById('quantity').value + '&names=' + names;
+  };
+  document.querySelectorAll('select').forEach(s => s.onchange = update);
+  document.getElementById('features').textContent = JSON.stringify(await (await fetch('/api/features')).json(), null, 1);
+  update();
+}
+init();
+</script>
+</body></html>
+"""
+
+
+def make_handler(campaign, cache):
+    """
+    Request handler class bound to one loaded campaign and its figure cache.
+    """
+
+    class DashboardHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                self.route(url.path, query)
+            except KeyError as error:
+                self.send_json({'error': f"missing parameter {error}"}, status=400)
+            except ValueError as error:
+                self.send_json({'error': str(error)}, status=400)
+
+        def route(self, path, query):
+            max_points = int(query.get('max_points', MAX_POINTS))
+            profile = query.get('profile', 'preview')
+            names = [name for name in query.get('names', '').split(',') if name]
+            if path == '/':
+                self.send_body(PAGE.encode(), 'text/html; charset=utf-8')
+            elif path == '/api/index':
+                self.send_json(campaign.index())
+            elif path == '/api/cp':
+                self.send_json(campaign.cp(float(query['alpha']), float(query.get('tolerance', 0.05)), max_points))
+            elif path == '/api/run':
+                self.send_json(campaign.run(int(query['run'])))
+            elif path == '/api/polar':
+                self.send_json(campaign.polar(names or list(campaign.polars), max_points))
+            elif path == '/api/features':
+                features = campaign.features.astype(object).where(campaign.features.notna(), None)
+                self.send_json(features.to_dict(orient='records'))
+            elif path == '/api/cache':
+                self.send_json({'entries': len(cache.entries), 'hits': cache.hits, 'misses': cache.misses})
+            elif path == '/plot/cp.png':
+                style = query.get('style', 'plotter')
+                if style not in STYLES:
+                    raise ValueError(f"Unknown style '{style}', choose from {', '.join(STYLES)}")
+                self.send_png(cache.cp_png(float(query['alpha']), style, get_profile(profile)['name']))
+            elif path == '/plot/polar.png':
+                self.send_png(cache.polar_png(names, query.get('quantity', 'CL'), profile))
+            else:
+                self.send_json({'error': f"unknown path {path}"}, status=404)
+
+        def send_body(self, body, content_type, status=200):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, data, status=200):
+            if data is None:
+                data, status = {'error': "not found"}, 404
+            self.send_body(json.dumps(data).encode(), 'application/json', status)
+
+        def send_png(self, image):
+            if image is None:
+                self.send_json(None)
+            else:
+                self.send_body(image, 'image/png')
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for the start-up messages
+
+    return DashboardHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Browse the Cp runs and polars of a campaign in a web browser.")
+    parser.add_argument('--host', default='127.0.0.1', help="use 0.0.0.0 to share the dashboard on the network")
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--cp-folder', default=CP_FOLDER,
+                        help="folder with raw_2D.txt (or cp_store), real_results and xflr5_results")
+    parser.add_argument('--polars', nargs='*', default=None, help="polar files, defaults to 2d/Forces and 3D")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="rendered figures kept in memory")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    campaign = Campaign(args.cp_folder, args.polars, args.workers)
+    cache = FigureCache(campaign, args.cache_size)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(campaign, cache))
+    print(f"{len(campaign.runs['alpha'])} runs, {len(campaign.xflr5)} XFLR5 Cp files and "
+          f"{len(campaign.polars)} polars loaded; serving on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
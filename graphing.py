@@ -0,0 +1,75 @@
+#single entry point for all scripts of the repository: python graphing.py <command> [options]
+
+import argparse
+import importlib
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# command -> (folder, module, help). Modules are imported only when their
+# command runs, so --help never loads numpy, pandas or matplotlib.
+COMMANDS = {
+    'reduce-cp': (os.path.join('2d', 'Cp'), 'cp_getter', "reduce raw_2D.txt to Cp per run: plot and export rows as CSV, or --all into the NPZ Cp store"),
+    'compare-cp': (os.path.join('2d', 'Cp'), 'cp_grapher', "compare XFLR5 and measured Cp distributions"),
+    'cp-residuals': (os.path.join('2d', 'Cp'), 'cp_resample', "per-tap residuals and RMS of XFLR5 against the measured Cp"),
+    'panel': (os.path.join('2d', 'Cp'), 'panel_solver', "inviscid panel solution of the airfoil, as Cp files in the XFLR5 layout"),
+    'polar': (os.path.join('2d', 'Forces'), 'grapher', "compare the XFLR5 and wind tunnel force polars"),
+    'wing3d': ('3D', 'Force_graph_3D', "compare two XFLR5 wing polars"),
+    'induced-drag': ('3D', 'Induced_drag', "induced drag and Oswald efficiency of wing polars"),
+    'features': ('.', 'polar_features', "CLmax, stall, zero-lift angle, lift slope and max L/D of many polars"),
+    'dashboard': ('.', 'dashboard', "local web server to browse the Cp runs and polars of a campaign"),
+    'campaigns': ('.', 'campaigns', "reduce, average, score and plot every campaign of a config file"),
+}
+
+# Alternative modules selected with --style / --all-methods
+COMPARE_CP_STYLES = {'grapher': 'cp_grapher', 'plotter': 'cp_plotter'}
+WING3D_ALL_METHODS = 'wing_compare'
+
+
+def load_command(folder, module):
+    """
+    Imports a script module from its folder, so it finds its sibling modules.
+    """
+    path = os.path.join(HERE, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Wind tunnel and XFLR5 data reduction and plotting.",
+        epilog="Options after the command are passed on to it; use '<command> --help' to list them.")
+    parser.add_argument('--profile', action='store_true',
+                        help="print the time and memory of every stage at exit (same as GRAPHING_PROFILE=1)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="also trace the peak allocated memory of every stage (slower)")
+    parser.add_argument('--trace', metavar='FILE', help="write every stage as a Chrome trace JSON")
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+    for name, (_, _, help_text) in COMMANDS.items():
+        # The command's own parser handles its options, including --help
+        command = commands.add_parser(name, help=help_text, add_help=False)
+        if name == 'compare-cp':
+            command.add_argument('--style', choices=COMPARE_CP_STYLES, default='grapher',
+                                 help="cp_grapher (one figure per AoA) or cp_plotter layout")
+        if name == 'wing3d':
+            command.add_argument('--all-methods', action='store_true',
+                                 help="compare every analysis of a folder with wing_compare")
+    args, rest = parser.parse_known_args(argv)
+
+    if args.profile or args.profile_memory or args.trace:
+        # Standard library only, so the flag does not slow down start-up
+        import instrumentation
+        instrumentation.enable(memory=args.profile_memory, trace_path=args.trace)
+
+    folder, module, _ = COMMANDS[args.command]
+    if args.command == 'compare-cp':
+        module = COMPARE_CP_STYLES[args.style]
+    if args.command == 'wing3d' and args.all_methods:
+        module = WING3D_ALL_METHODS
+    return load_command(folder, module).main(rest)
+
+
+if __name__ == "__main__":
+    main()
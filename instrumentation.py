@@ -0,0 +1,192 @@
+#optional timing and memory spans around the load, reduce, export and render stages of all scripts
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where only the tracemalloc peak is reported
+    resource = None
+
+# GRAPHING_PROFILE=1 records wall time and RSS, GRAPHING_PROFILE=memory adds
+# the tracemalloc peak of every span (slower). GRAPHING_TRACE=file.json also
+# writes every span as a Chrome trace (chrome://tracing, Perfetto).
+PROFILE_VARIABLE = 'GRAPHING_PROFILE'
+TRACE_VARIABLE = 'GRAPHING_TRACE'
+
+_state = None
+
+
+class _NullSpan:
+    """
+    Span used while profiling is off: entering and leaving it does nothing.
+    """
+
+    count = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _stack():
+    # Spans nest per thread, the thread pool of parallel_loader runs parsers side by side
+    local = _state['local']
+    if not hasattr(local, 'stack'):
+        local.stack = []
+    return local.stack
+
+
+class _Span:
+    def __init__(self, name, count):
+        self.name = name
+        self.count = count
+
+    def __enter__(self):
+        stack = _stack()
+        if _state['memory']:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = current
+            self.peak = current
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        stack = _stack()
+        stack.pop()
+
+        peak = None
+        if _state['memory']:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak = self.peak - self.start_memory
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        _record(self.name, self.start, end, self.count, peak)
+        return False
+
+
+def _max_rss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kB, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _record(name, start, end, count, peak):
+    with _state['lock']:
+        stats = _state['stats'].get(name)
+        if stats is None:
+            stats = _state['stats'][name] = {'calls': 0, 'seconds': 0.0, 'count': 0, 'peak': None, 'rss': None}
+        stats['calls'] += 1
+        stats['seconds'] += end - start
+        if count is not None:
+            stats['count'] += count
+        if peak is not None:
+            stats['peak'] = max(stats['peak'] or 0, peak)
+        stats['rss'] = _max_rss()
+        if _state['trace_path']:
+            _state['events'].append({
+                'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                'ts': (start - _state['origin']) * 1e6, 'dur': (end - start) * 1e6,
+                'args': {'count': count, 'peak_bytes': peak},
+            })
+
+
+def enable(memory=False, trace_path=None):
+    """
+    Switches profiling on for the rest of the process; the summary prints at exit.
+
+    Parameters:
+        memory (bool): Also trace allocations for the peak memory of every span.
+        trace_path (str): Write a Chrome trace JSON with every span to this file.
+    """
+    global _state
+    if _state is not None:
+        return
+    _state = {
+        'stats': {}, 'local': threading.local(), 'events': [], 'lock': threading.Lock(),
+        'memory': memory, 'trace_path': trace_path, 'origin': time.perf_counter(),
+    }
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    atexit.register(report)
+
+
+def enabled():
+    return _state is not None
+
+
+def span(name, count=None):
+    """
+    Context manager that times a stage.
+
+    The count (rows, files, figures) can be passed up front or set on the
+    returned span inside the block, e.g. `with span('cp.load') as s: ...; s.count = len(rows)`.
+    Returns a shared no-op span while profiling is off.
+    """
+    if _state is None:
+        return _NULL_SPAN
+    return _Span(name, count)
+
+
+def summary():
+    """
+    Returns:
+        list: One dict per span name with calls, seconds, count, peak and rss (bytes).
+    """
+    if _state is None:
+        return []
+    with _state['lock']:
+        return [dict(stats, name=name) for name, stats in _state['stats'].items()]
+
+
+def _megabytes(value):
+    return f"{value / 2**20:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def report(file=None):
+    """
+    Prints the summary table and writes the trace file, if one was requested.
+    """
+    if _state is None or not _state['stats']:
+        return
+    file = file or sys.stderr
+
+    print(f"\n{'stage':<32} {'calls':>6} {'total s':>9} {'mean ms':>9} {'count':>9} {'count/s':>10} "
+          f"{'peak MB':>9} {'RSS MB':>9}", file=file)
+    for stats in summary():
+        if stats['count'] and stats['seconds'] > 0:
+            rate = f"{stats['count'] / stats['seconds']:10.0f}"
+        else:
+            rate = f"{'-':>10}"
+        print(f"{stats['name']:<32} {stats['calls']:>6} {stats['seconds']:9.3f} "
+              f"{stats['seconds'] / stats['calls'] * 1000:9.2f} {stats['count'] or '-':>9} "
+              f"{rate} {_megabytes(stats['peak'])} {_megabytes(stats['rss'])}", file=file)
+
+    if _state['trace_path']:
+        with open(_state['trace_path'], 'w') as trace:
+            json.dump({'traceEvents': _state['events'], 'displayTimeUnit': 'ms'}, trace)
+        print(f"Trace written to {_state['trace_path']}", file=file)
+
+
+# Scripts started directly are switched on through the environment
+if os.environ.get(PROFILE_VARIABLE, '').lower() not in ('', '0', 'false', 'no'):
+    enable(memory=os.environ[PROFILE_VARIABLE].lower() == 'memory',
+           trace_path=os.environ.get(TRACE_VARIABLE))
@@ -0,0 +1,89 @@
+#output presets (preview, report, print) that pick dpi, file format and marker density for every saved figure
+
+import math
+import os
+
+# dpi: raster resolution; format: file type; max_markers: most markers drawn
+# per line before they are thinned out (None keeps all); vector_limit: above
+# this many plotted points a vector format is swapped for a raster one at
+# raster_dpi, because every point becomes a path object in SVG/PDF.
+PROFILES = {
+    'preview': {'dpi': 80, 'format': 'png', 'max_markers': 40, 'vector_limit': None, 'raster_dpi': None},
+    'report': {'dpi': 200, 'format': 'png', 'max_markers': 120, 'vector_limit': None, 'raster_dpi': None},
+    'print': {'dpi': 600, 'format': 'pdf', 'max_markers': None, 'vector_limit': 20000, 'raster_dpi': 600},
+}
+
+# Picked when neither the script nor GRAPHING_OUTPUT_PROFILE asks for another one
+DEFAULT_PROFILE = 'report'
+PROFILE_VARIABLE = 'GRAPHING_OUTPUT_PROFILE'
+
+
+def get_profile(name=None):
+    """
+    Looks up an output profile.
+
+    Parameters:
+        name (str or dict): Profile name, an already resolved profile, or None
+            for GRAPHING_OUTPUT_PROFILE / DEFAULT_PROFILE.
+
+    Returns:
+        dict: The profile settings, with its name under 'name'.
+    """
+    if isinstance(name, dict):
+        return name
+    name = name or os.environ.get(PROFILE_VARIABLE) or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown output profile '{name}', choose from {', '.join(PROFILES)}")
+    return dict(PROFILES[name], name=name)
+
+
+def choose_format(profile, n_points=0):
+    """
+    File format and dpi for a figure with n_points plotted points.
+
+    Returns:
+        tuple: (format, dpi)
+    """
+    profile = get_profile(profile)
+    if profile['vector_limit'] is not None and n_points > profile['vector_limit']:
+        return 'png', profile['raster_dpi']
+    return profile['format'], profile['dpi']
+
+
+def markevery(n_points, profile=None):
+    """
+    Stride for matplotlib's markevery that keeps at most max_markers markers on a line.
+
+    Returns:
+        int or None: None draws every marker.
+    """
+    limit = get_profile(profile)['max_markers']
+    if limit is None or n_points <= limit:
+        return None
+    return math.ceil(n_points / limit)
+
+
+def plotted_points(figure):
+    # Total number of data points of all lines of a figure
+    return sum(len(line.get_xdata()) for ax in figure.axes for line in ax.get_lines())
+
+
+def save_figure(figure, folder, stem, profile=None, **kwargs):
+    """
+    Saves a figure in the format and resolution of an output profile.
+
+    Parameters:
+        figure (Figure): The figure to save.
+        folder (str): Output folder, created when it does not exist.
+        stem (str): File name without extension.
+        profile (str or dict): Output profile, see get_profile.
+        **kwargs: Passed on to savefig, e.g. bbox_inches='tight'.
+
+    Returns:
+        str: Path of the saved file.
+    """
+    file_format, dpi = choose_format(profile, plotted_points(figure))
+    os.makedirs(folder or '.', exist_ok=True)
+    path = os.path.join(folder, f"{stem}.{file_format}")
+    figure.savefig(path, dpi=dpi, format=file_format, **kwargs)
+    return path
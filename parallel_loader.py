@@ -0,0 +1,76 @@
+#loads a folder of per-AoA result files in parallel, parsing every file exactly once
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Below this average file size a thread pool beats the process start-up cost
+SMALL_FILE_BYTES = 256 * 1024
+# Folders with fewer files than this are read serially
+MIN_PARALLEL_FILES = 8
+
+
+def _choose_executor(files, executor):
+    if executor is not None:
+        return executor
+    if len(files) < MIN_PARALLEL_FILES:
+        return 'serial'
+    average_size = sum(os.path.getsize(f) for f in files) / len(files)
+    return 'thread' if average_size < SMALL_FILE_BYTES else 'process'
+
+
+def load_files(files, parser, workers=None, executor=None):
+    """
+    Runs parser on every file once, fanning out over a thread or process pool.
+
+    Parameters:
+        files (list): Paths to parse.
+        parser (callable): parser(path) -> result. Must be a module-level
+            function when a process pool is used.
+        workers (int): Pool size, defaults to the number of CPUs.
+        executor (str): 'serial', 'thread' or 'process'; chosen from the
+            number and size of the files when None.
+
+    Returns:
+        list: Parser results in the order of files.
+    """
+    files = list(files)
+    executor = _choose_executor(files, executor)
+    workers = workers or os.cpu_count() or 1
+
+    if executor == 'serial' or workers == 1:
+        return [parser(f) for f in files]
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parser, files))
+    if executor == 'process':
+        # Hand out files in batches so a pool of N workers pickles far fewer tasks
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parser, files, chunksize=chunksize))
+    raise ValueError(f"Unknown executor '{executor}'")
+
+
+def load_directory(folder, pattern, parser, workers=None, executor=None):
+    """
+    Loads every matching file of a folder into an alpha-indexed dictionary.
+
+    Parameters:
+        folder (str): Folder to scan.
+        pattern (str): Glob pattern, e.g. '*.txt'.
+        parser (callable): parser(path) -> (alpha, data).
+        workers (int): Pool size, defaults to the number of CPUs.
+        executor (str): 'serial', 'thread' or 'process', see load_files.
+
+    Returns:
+        dict: alpha -> data, sorted by alpha.
+    """
+    files = sorted(glob.glob(os.path.join(folder, pattern)))
+    results = load_files(files, parser, workers, executor)
+
+    data = {}
+    for file, (alpha, parsed) in zip(files, results):
+        if alpha in data:
+            print(f"Warning: AoA {alpha} appears more than once, using {file}")
+        data[alpha] = parsed
+    return dict(sorted(data.items()))
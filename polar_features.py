@@ -0,0 +1,263 @@
+#extracts CLmax, stall, zero-lift angle, lift slope and max L/D from many polars at once
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+from parallel_loader import load_files
+from xflr5_parser import read_xflr5
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Every polar is resampled on one alpha grid with this step in degrees
+DEFAULT_STEP = 0.1
+# Points of the centred moving average applied before differentiating
+SMOOTHING_WINDOW = 7
+# Alpha range of the least-squares lift slope
+LINEAR_RANGE = (-5.0, 5.0)
+# The stall onset is the first CL peak that reaches this fraction of CLmax
+STALL_FRACTION = 0.9
+
+DEFAULT_POLARS = [
+    os.path.join(HERE, '2d', 'Forces', 'SD6060-104-88_T1_Re0.231_M0.00_N9.0.txt'),
+    os.path.join(HERE, '2d', 'Forces', 'plots_data.csv'),
+    os.path.join(HERE, '3D', 'xflr5_data', '*.txt'),
+]
+
+
+def load_polar(path):
+    """
+    Reads alpha, CL and CD of an XFLR5 polar (2D or 3D) or of a CSV polar with those columns.
+
+    A CSV polar with only the pressure drag CDp (cp_uncertainty.py) gives
+    CDp as CD, like grapher.load_experimental_data.
+
+    Returns:
+        tuple: (alpha, CL, CD) arrays.
+    """
+    if path.lower().endswith('.csv'):
+        data = pd.read_csv(path)
+        drag = 'CD' if 'CD' in data else 'CDp'
+        return data['alpha'].to_numpy(float), data['CL'].to_numpy(float), data[drag].to_numpy(float)
+    data = read_xflr5(path)
+    return data['alpha'], data['CL'], data['CD']
+
+
+def resample(polars, step=DEFAULT_STEP):
+    """
+    Puts polars with their own alpha points on one shared alpha grid.
+
+    Repeated alphas (e.g. repeated tunnel runs) are averaged first; every
+    polar is linearly interpolated inside its own alpha range and NaN outside.
+
+    Parameters:
+        polars (dict): name -> (alpha, CL, CD).
+        step (float): Grid step in degrees.
+
+    Returns:
+        tuple: (alpha, names, blocks) with blocks 'CL' and 'CD' as (alphas x polars) arrays.
+    """
+    names = list(polars)
+    low = min(np.nanmin(polars[name][0]) for name in names)
+    high = max(np.nanmax(polars[name][0]) for name in names)
+    alpha = np.round(np.arange(np.floor(low / step), np.ceil(high / step) + 1) * step, 10)
+
+    blocks = {q: np.full((len(alpha), len(names)), np.nan) for q in ('CL', 'CD')}
+    for j, name in enumerate(names):
+        points, inverse = np.unique(np.asarray(polars[name][0], dtype=float), return_inverse=True)
+        counts = np.bincount(inverse)
+        inside = (alpha >= points[0]) & (alpha <= points[-1])
+        for q, values in zip(('CL', 'CD'), polars[name][1:]):
+            mean = np.bincount(inverse, weights=np.asarray(values, dtype=float)) / counts
+            blocks[q][inside, j] = np.interp(alpha[inside], points, mean)
+    return alpha, names, blocks
+
+
+def smooth(block, window=SMOOTHING_WINDOW):
+    """
+    Centred moving average down every column, ignoring NaN and shrinking at the ends.
+    """
+    if window <= 1:
+        return block.copy()
+    valid = ~np.isnan(block)
+    padding = np.zeros((1, block.shape[1]))
+    sums = np.concatenate([padding, np.cumsum(np.where(valid, block, 0), axis=0)])
+    counts = np.concatenate([padding, np.cumsum(valid, axis=0)])
+    n = len(block)
+    start = np.clip(np.arange(n) - window // 2, 0, n)
+    stop = np.clip(np.arange(n) + window // 2 + 1, 0, n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        smoothed = (sums[stop] - sums[start]) / (counts[stop] - counts[start])
+    return np.where(valid, smoothed, np.nan)
+
+
+def lift_slopes(alpha, cl_block, alpha_range=LINEAR_RANGE):
+    """
+    Least-squares lift-curve slope of every column over the linear range.
+
+    Returns:
+        tuple: (slope per degree, intercept), one value per column.
+    """
+    x = alpha[:, np.newaxis] * np.ones_like(cl_block)
+    use = (~np.isnan(cl_block)) & (x >= alpha_range[0]) & (x <= alpha_range[1])
+    n = use.sum(axis=0)
+    x_mean = np.where(use, x, 0).sum(axis=0) / np.maximum(n, 1)
+    y_mean = np.where(use, cl_block, 0).sum(axis=0) / np.maximum(n, 1)
+    dx = np.where(use, x - x_mean, 0)
+    dy = np.where(use, cl_block - y_mean, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (dx * dy).sum(axis=0) / (dx * dx).sum(axis=0)
+    slopes = np.where(n >= 2, slopes, np.nan)
+    return slopes, y_mean - slopes * x_mean
+
+
+def first_crossing(alpha, block, rising=True):
+    """
+    Alpha of the first sign change of every column, linearly interpolated between grid points.
+
+    Parameters:
+        rising (bool): Look for - to + crossings, else for + to - crossings.
+
+    Returns:
+        array: Root per column, NaN where the column never crosses zero.
+    """
+    before, after = block[:-1], block[1:]
+    if rising:
+        crossing = (before < 0) & (after >= 0)
+    else:
+        crossing = (before > 0) & (after <= 0)
+    found = crossing.any(axis=0)
+    index = np.argmax(crossing, axis=0)
+    columns = np.arange(block.shape[1])
+    y0, y1 = before[index, columns], after[index, columns]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        root = alpha[index] + (alpha[index + 1] - alpha[index]) * y0 / (y0 - y1)
+    return np.where(found, root, np.nan)
+
+
+def _parabola_vertex(alpha, block, index):
+    # Vertex of the parabola through the grid points around index in every column;
+    # the grid point itself where a neighbour is missing or the points are not a peak
+    columns = np.arange(block.shape[1])
+    y1 = block[index, columns]
+    y0 = block[np.maximum(index - 1, 0), columns]
+    y2 = block[np.minimum(index + 1, len(alpha) - 1), columns]
+    curvature = y0 - 2 * y1 + y2
+    fit = (curvature < 0) & (index > 0) & (index < len(alpha) - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shift = np.where(fit, np.clip(0.5 * (y0 - y2) / curvature, -1, 1), 0.0)
+    step = alpha[1] - alpha[0]
+    return alpha[index] + shift * step, np.where(fit, y1 - 0.25 * (y0 - y2) * shift, y1)
+
+
+def polar_features(alpha, names, blocks, window=SMOOTHING_WINDOW, alpha_range=LINEAR_RANGE,
+                   stall_fraction=STALL_FRACTION):
+    """
+    Feature summary of every polar of a resampled block, see resample.
+
+    CLmax and its alpha come from a parabola fitted through the peak of the
+    smoothed CL. The stall onset is the first peak of the smoothed CL, where
+    the finite-difference slope turns negative, that reaches stall_fraction
+    of CLmax; it is earlier than alpha_cl_max for polars with two peaks. The
+    zero-lift angle is the first root of CL, or of the linear fit when the
+    polar does not cross zero. Polars that still climb at their last point
+    (e.g. inviscid ones) have no stall: alpha_stall is NaN and cl_max is the
+    last CL.
+
+    Returns:
+        DataFrame: One row per polar with name, alpha_min, alpha_max,
+        cl_alpha (per degree), cl_alpha_rad, alpha_zero_lift, cl_max,
+        alpha_cl_max, alpha_stall, cl_stall, cd_min, ld_max and alpha_ld_max.
+    """
+    cl, cd = blocks['CL'], blocks['CD']
+    valid = ~np.isnan(cl)
+    has_data = valid.any(axis=0)
+    first = np.argmax(valid, axis=0)
+    last = len(alpha) - 1 - np.argmax(valid[::-1], axis=0)
+
+    slope, intercept = lift_slopes(alpha, cl, alpha_range)
+    alpha_zero_lift = first_crossing(alpha, cl, rising=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        alpha_zero_lift = np.where(np.isnan(alpha_zero_lift), -intercept / slope, alpha_zero_lift)
+
+    smoothed = smooth(cl, window)
+    peak = np.argmax(np.where(valid, smoothed, -np.inf), axis=0)
+    alpha_cl_max, cl_max = _parabola_vertex(alpha, smoothed, peak)
+
+    # Local maxima of the smoothed CL: the central difference changes from + to -
+    gradient = np.gradient(smoothed, alpha, axis=0)
+    peaks = (gradient[:-1] > 0) & (gradient[1:] <= 0) & (smoothed[:-1] >= stall_fraction * cl_max)
+    stalls = peaks.any(axis=0)
+    alpha_stall, cl_stall = _parabola_vertex(alpha, smoothed, np.argmax(peaks, axis=0))
+    alpha_stall[~stalls] = np.nan
+    cl_stall[~stalls] = np.nan
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ld = np.where(cd > 0, cl / cd, np.nan)
+    ld_valid = ~np.isnan(ld)
+    best = np.argmax(np.where(ld_valid, ld, -np.inf), axis=0)
+    columns = np.arange(cl.shape[1])
+    has_ld = ld_valid.any(axis=0)
+
+    table = pd.DataFrame({
+        'name': names,
+        'alpha_min': alpha[first],
+        'alpha_max': alpha[last],
+        'cl_alpha': slope,
+        'cl_alpha_rad': np.degrees(slope),
+        'alpha_zero_lift': alpha_zero_lift,
+        'cl_max': cl_max,
+        'alpha_cl_max': alpha_cl_max,
+        'alpha_stall': alpha_stall,
+        'cl_stall': cl_stall,
+        'cd_min': np.where(np.isnan(cd).all(axis=0), np.nan, np.nanmin(np.where(np.isnan(cd), np.inf, cd), axis=0)),
+        'ld_max': np.where(has_ld, ld[best, columns], np.nan),
+        'alpha_ld_max': np.where(has_ld, alpha[best], np.nan),
+    })
+    # Columns without any point only keep their name
+    table.loc[~has_data, table.columns[1:]] = np.nan
+    return table
+
+
+def summarize(paths, step=DEFAULT_STEP, window=SMOOTHING_WINDOW, alpha_range=LINEAR_RANGE, workers=None):
+    """
+    Loads polar files and returns their feature table, see polar_features.
+    """
+    with span('polar_features.load') as stage:
+        polars = dict(zip(paths, load_files(paths, load_polar, workers)))
+        stage.count = len(polars)
+    with span('polar_features.extract', len(polars)):
+        alpha, names, blocks = resample(polars, step)
+        table = polar_features(alpha, names, blocks, window, alpha_range)
+    table['name'] = [os.path.splitext(os.path.basename(name))[0] for name in names]
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the lift, stall and L/D features of many polars.")
+    parser.add_argument('polars', nargs='*', default=DEFAULT_POLARS,
+                        help="XFLR5 polars or CSV polars (alpha, CL, CD); glob patterns are expanded")
+    parser.add_argument('--step', type=float, default=DEFAULT_STEP, help="resampling step in degrees")
+    parser.add_argument('--window', type=int, default=SMOOTHING_WINDOW, help="moving average points")
+    parser.add_argument('--alpha-min', type=float, default=LINEAR_RANGE[0], help="start of the lift slope fit")
+    parser.add_argument('--alpha-max', type=float, default=LINEAR_RANGE[1], help="end of the lift slope fit")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help="CSV file for the summary table")
+    args = parser.parse_args(argv)
+
+    paths = sorted({path for pattern in args.polars for path in (glob.glob(pattern) or [pattern])})
+    table = summarize(paths, args.step, args.window, (args.alpha_min, args.alpha_max), args.workers)
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Features of {len(table)} polars written to {args.output}")
+    else:
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(table.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+
+if __name__ == "__main__":
+    main()
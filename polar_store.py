@@ -0,0 +1,172 @@
+#in-memory store of polars and Cp distributions from several sources, indexed by angle of attack
+
+import numpy as np
+
+
+def _bracket(sorted_alpha, alphas):
+    """
+    Finds the interpolation interval of every query alpha with one binary search.
+
+    Returns:
+        tuple: (lower index, upper index, weight of the upper point, inside-range mask).
+        The mask is all False when sorted_alpha is empty.
+    """
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    n = len(sorted_alpha)
+    if n == 0:
+        zeros = np.zeros(alphas.shape, dtype=int)
+        return zeros, zeros, np.zeros(alphas.shape), np.zeros(alphas.shape, dtype=bool)
+    hi = np.clip(np.searchsorted(sorted_alpha, alphas, side='right'), 1, max(n - 1, 1))
+    lo = hi - 1
+    if n == 1:
+        hi = lo = np.zeros_like(hi)
+        weight = np.zeros(alphas.shape)
+    else:
+        span = sorted_alpha[hi] - sorted_alpha[lo]
+        weight = np.divide(alphas - sorted_alpha[lo], span, out=np.zeros(alphas.shape), where=span > 0)
+    inside = (alphas >= sorted_alpha[0]) & (alphas <= sorted_alpha[-1])
+    return lo, hi, weight, inside
+
+
+def nearest_indices(sorted_alpha, alphas, tolerance):
+    """
+    Nearest-neighbour lookup of many alphas in a sorted alpha array.
+
+    Parameters:
+        sorted_alpha (array): Sorted alphas of a source.
+        alphas (array): Query alphas.
+        tolerance (float): Largest accepted distance in degrees.
+
+    Returns:
+        array: Index into sorted_alpha per query, -1 where nothing is within tolerance.
+    """
+    sorted_alpha = np.asarray(sorted_alpha, dtype=float)
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    if len(sorted_alpha) == 0:
+        return np.full(alphas.shape, -1)
+
+    right = np.clip(np.searchsorted(sorted_alpha, alphas), 0, len(sorted_alpha) - 1)
+    left = np.clip(right - 1, 0, len(sorted_alpha) - 1)
+    take_left = np.abs(alphas - sorted_alpha[left]) <= np.abs(alphas - sorted_alpha[right])
+    index = np.where(take_left, left, right)
+    return np.where(np.abs(alphas - sorted_alpha[index]) <= tolerance, index, -1)
+
+
+def match_alphas(alphas_a, alphas_b, tolerance=0.05):
+    """
+    Pairs every alpha of a with the nearest alpha of b within tolerance.
+
+    Returns:
+        list: (alpha_a, alpha_b) pairs, sorted by alpha_a.
+    """
+    alphas_a = np.sort(np.asarray(list(alphas_a), dtype=float))
+    alphas_b = np.sort(np.asarray(list(alphas_b), dtype=float))
+    index = nearest_indices(alphas_b, alphas_a, tolerance)
+    found = index >= 0
+    return list(zip(alphas_a[found].tolist(), alphas_b[index[found]].tolist()))
+
+
+class PolarStore:
+    """
+    Per-source columns (CL, CD, Cm, Cp, ...) kept sorted by alpha.
+
+    Scalar columns are 1D arrays (one value per alpha). Cp is stored as a
+    (alphas x points) matrix with the shared x/c of the points in the 'x' entry.
+    """
+
+    def __init__(self):
+        self.sources = {}
+
+    def add(self, name, alpha, **columns):
+        """
+        Adds or replaces a source. Every column must have one row per alpha.
+        """
+        alpha = np.asarray(alpha, dtype=float)
+        order = np.argsort(alpha, kind='stable')
+        source = {'alpha': alpha[order]}
+        for column, values in columns.items():
+            values = np.asarray(values, dtype=float)
+            if values.shape[0] != len(alpha):
+                raise ValueError(f"Column '{column}' of '{name}' has {values.shape[0]} rows for {len(alpha)} alphas")
+            source[column] = values[order]
+        self.sources[name] = source
+
+    def add_xflr5(self, name, data):
+        """
+        Adds an XFLR5 polar (2D or 3D) as read by xflr5_parser.read_xflr5.
+        """
+        columns = {column: data[column] for column in data.columns if column != 'alpha'}
+        self.add(name, data['alpha'], **columns)
+
+    def add_cp(self, name, alpha, x, cp):
+        """
+        Adds Cp distributions that share one set of x/c points.
+
+        Parameters:
+            alpha (array): One alpha per distribution.
+            x (array): x/c of the points.
+            cp (array): (alphas x points) Cp matrix.
+        """
+        self.add(name, alpha, Cp=np.atleast_2d(cp))
+        self.sources[name]['x'] = np.asarray(x, dtype=float)
+
+    def alphas(self, name):
+        return self.sources[name]['alpha']
+
+    def columns(self, name):
+        return [column for column in self.sources[name] if column not in ('alpha', 'x')]
+
+    def at(self, name, alphas, columns=None):
+        """
+        Linearly interpolates columns of a source at many alphas at once.
+
+        Parameters:
+            name (str): Source name.
+            alphas (array): Query alphas.
+            columns (list): Columns to return, defaults to all of them.
+
+        Returns:
+            dict: column -> values at the query alphas, NaN outside the source
+            range (everywhere for a source without rows).
+        """
+        source = self.sources[name]
+        lo, hi, weight, inside = _bracket(source['alpha'], alphas)
+        result = {}
+        for column in columns or self.columns(name):
+            values = source[column]
+            if len(values) == 0:
+                result[column] = np.full(weight.shape + values.shape[1:], np.nan)
+                continue
+            # Broadcast the weights over the points of 2D columns such as Cp
+            w = weight.reshape((-1,) + (1,) * (values.ndim - 1))
+            interpolated = (1 - w) * values[lo] + w * values[hi]
+            interpolated[~inside] = np.nan
+            result[column] = interpolated
+        return result
+
+    def nearest(self, name, alphas, tolerance=0.05, columns=None):
+        """
+        Returns the rows of a source closest to the query alphas.
+
+        Returns:
+            dict: 'alpha' (matched alphas, NaN where nothing is within tolerance)
+            plus the requested columns.
+        """
+        source = self.sources[name]
+        index = nearest_indices(source['alpha'], alphas, tolerance)
+        found = index >= 0
+        result = {}
+        for column in ['alpha'] + (columns or self.columns(name)):
+            if len(source[column]) == 0:
+                result[column] = np.full(found.shape + source[column].shape[1:], np.nan)
+                continue
+            values = source[column][np.where(found, index, 0)]
+            values[~found] = np.nan
+            result[column] = values
+        return result
+
+    def match(self, name_a, name_b, tolerance=0.05):
+        """
+        Pairs the alphas of two sources by nearest neighbour within tolerance.
+        """
+        return match_alphas(self.alphas(name_a), self.alphas(name_b), tolerance)
@@ -0,0 +1,96 @@
+#groups repeated wind tunnel runs by angle of attack and computes their mean, spread and confidence band
+
+from statistics import NormalDist
+
+import numpy as np
+
+# Runs whose alphas round to the same multiple of this width are averaged
+DEFAULT_BIN_WIDTH = 0.25
+DEFAULT_CONFIDENCE = 0.95
+
+
+def alpha_bins(alpha, width=DEFAULT_BIN_WIDTH):
+    """
+    Assigns every run to an alpha bin.
+
+    Parameters:
+        alpha (array): Alpha of every run in degrees.
+        width (float): Bin width in degrees; runs are binned on the nearest multiple.
+
+    Returns:
+        tuple: (centers, inverse) with the sorted bin centers and the bin
+        index of every run.
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    steps, inverse = np.unique(np.round(alpha / width), return_inverse=True)
+    # + 0.0 turns the -0.0 of the rounding into 0.0
+    return steps * width + 0.0, inverse.ravel()
+
+
+def _quantile(confidence, n):
+    """
+    Two-sided Student-t quantile for groups of n samples, normal without scipy.
+    """
+    level = 0.5 + confidence / 2
+    try:
+        from scipy.stats import t
+    except ImportError:
+        return np.full(np.shape(n), NormalDist().inv_cdf(level))
+    with np.errstate(invalid='ignore'):
+        return t.ppf(level, np.maximum(n - 1, 1))
+
+
+def _group_sums(values, inverse, n_groups):
+    # Sum of every column per group with one bincount over (group, column) cells
+    columns = values.reshape(len(values), -1)
+    width = columns.shape[1]
+    cells = (inverse[:, np.newaxis] * width + np.arange(width)).ravel()
+    sums = np.bincount(cells, weights=columns.ravel(), minlength=n_groups * width)
+    return sums.reshape((n_groups,) + values.shape[1:])
+
+
+def group_statistics(values, inverse, n_groups=None, confidence=DEFAULT_CONFIDENCE):
+    """
+    Mean, standard deviation and confidence half-width of every group in one pass.
+
+    The groups are summed with one np.bincount over all (group, column)
+    cells, so every column of values (e.g. every tap) is reduced together
+    without a (groups x runs) indicator matrix.
+
+    Parameters:
+        values (array): (runs,) or (runs x columns) samples.
+        inverse (array): Group index of every run, see alpha_bins.
+        n_groups (int): Number of groups, defaults to inverse.max() + 1.
+        confidence (float): Confidence level of the band around the mean.
+
+    Returns:
+        dict: 'n' (runs per group), 'mean', 'std' (sample standard deviation)
+        and 'ci' (half-width of the confidence interval of the mean). std and
+        ci are NaN for groups with a single run.
+    """
+    values = np.asarray(values, dtype=float)
+    inverse = np.asarray(inverse)
+    n_groups = int(inverse.max()) + 1 if n_groups is None else n_groups
+
+    n = np.bincount(inverse, minlength=n_groups).astype(float)
+    shape = (-1,) + (1,) * (values.ndim - 1)
+    sums = _group_sums(values, inverse, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / n.reshape(shape)
+    # Squared deviations from the group mean, which stays accurate for large offsets
+    squares = _group_sums((values - mean[inverse]) ** 2, inverse, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(squares / (n - 1).reshape(shape))
+    std[n < 2] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ci = _quantile(confidence, n).reshape(shape) * std / np.sqrt(n).reshape(shape)
+    return {'n': n.astype(int), 'mean': mean, 'std': std, 'ci': ci}
+
+
+def total_error(ci, uncertainty):
+    """
+    Error bar combining the scatter of the runs and the propagated measurement uncertainty.
+
+    Groups with a single run have no scatter estimate and only get the uncertainty.
+    """
+    return np.sqrt(np.nan_to_num(ci) ** 2 + np.nan_to_num(uncertainty) ** 2)
@@ -0,0 +1,60 @@
+#starts the dashboard on the polars of 2d/Forces with the statistics polar of cp_uncertainty.py next to them
+
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.request import urlopen
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(HERE, '..', '2d', 'Cp'))
+
+import cp_uncertainty
+import dashboard
+
+
+@pytest.fixture
+def forces_folder(tmp_path, monkeypatch):
+    # A copy of 2d/Forces with the default output of cp_uncertainty.py (CDp, no CD) and a CSV that is no polar
+    for path in glob.glob(os.path.join(dashboard.FORCES_FOLDER, '*.txt')) + [
+            os.path.join(dashboard.FORCES_FOLDER, 'plots_data.csv')]:
+        shutil.copy(path, tmp_path)
+    cp_uncertainty.main(['--samples', '20', '--output', str(tmp_path / 'pressure_polar_statistics.csv')])
+    (tmp_path / 'notes.csv').write_text("run,comment\n1,flow visualisation\n")
+    monkeypatch.setattr(dashboard, 'FORCES_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def server(forces_folder):
+    campaign = dashboard.Campaign(polar_files=None, workers=1)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), dashboard.make_handler(campaign, dashboard.FigureCache(campaign)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get_json(url):
+    with urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def test_statistics_polar_is_served(server):
+    polars = get_json(server + '/api/index')['polars']
+    assert 'pressure_polar_statistics' in polars
+    assert 'plots_data' in polars
+    assert 'notes' not in polars
+
+    features = {row['name']: row for row in get_json(server + '/api/features')}
+    assert features['pressure_polar_statistics']['cd_min'] > 0
+
+    polar = get_json(server + '/api/polar?names=pressure_polar_statistics')
+    assert polar['pressure_polar_statistics']['CD']
@@ -0,0 +1,175 @@
+#shared reader for the text exports of XFLR5: Cp distributions, 2D foil polars and 3D wing polars
+
+import re
+
+import numpy as np
+
+CP_DISTRIBUTION = 'cp'
+POLAR_2D = 'polar2d'
+POLAR_3D = 'polar3d'
+
+# Column headers that XFLR5 writes as two words
+_MERGED_HEADERS = {('Top', 'Xtr'): 'Top_Xtr', ('Bot', 'Xtr'): 'Bot_Xtr'}
+
+_NUMBER = r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?'
+_ANALYSIS = re.compile(r'(LLT|VLM1|VLM2|Panel)(-Inviscid)?', re.IGNORECASE)
+
+
+class XFLR5Data:
+    """
+    Parsed XFLR5 file.
+
+    Attributes:
+        kind (str): CP_DISTRIBUTION, POLAR_2D or POLAR_3D.
+        meta (dict): Header values such as Alpha, Re, Ma, ACrit and analysis.
+        columns (list): Column names, in file order.
+        values (array): Data in Fortran order, so every column is contiguous.
+    """
+
+    def __init__(self, kind, meta, columns, values):
+        self.kind = kind
+        self.meta = meta
+        self.columns = columns
+        self.values = values
+
+    def __getitem__(self, name):
+        return self.values[:, self.columns.index(name)]
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def to_frame(self):
+        """Returns the data as a DataFrame, with the metadata in df.attrs."""
+        import pandas as pd
+
+        df = pd.DataFrame(self.values, columns=self.columns)
+        df.attrs.update(self.meta)
+        return df
+
+
+def _parse_header(header_lines):
+    """
+    Detects the file type and collects the metadata from the lines above the column header.
+    """
+    text = "\n".join(header_lines)
+    meta = {}
+
+    if "Calculated polar for" in text:
+        kind = POLAR_2D
+        match = re.search(r'Calculated polar for:\s*(.+)', text)
+        meta['airfoil'] = match.group(1).strip()
+        match = re.search(rf'Mach\s*=\s*({_NUMBER})', text)
+        if match:
+            meta['Ma'] = float(match.group(1))
+        match = re.search(rf'Re\s*=\s*({_NUMBER})\s*e\s*(\d+)', text)
+        if match:
+            meta['Re'] = float(match.group(1)) * 10**int(match.group(2))
+        match = re.search(rf'Ncrit\s*=\s*({_NUMBER})', text)
+        if match:
+            meta['ACrit'] = float(match.group(1))
+        meta['analysis'] = 'XFoil'
+    elif "Plane name" in text or "Polar name" in text:
+        kind = POLAR_3D
+        # Lines of the form "Plane name :        3d Wing analyses"
+        for line in header_lines:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                meta[key.strip()] = value.strip()
+        match = re.search(rf'({_NUMBER})', meta.get('Freestream speed', ''))
+        if match:
+            meta['speed'] = float(match.group(1))
+        match = _ANALYSIS.search(meta.get('Polar name', ''))
+        if match:
+            meta['analysis'] = match.group(0)
+            meta['method'] = match.group(1)
+            meta['viscous'] = match.group(2) is None
+    else:
+        kind = CP_DISTRIBUTION
+        # "Alpha =   0.0,  Re =   231000,  Ma = 0.0000,  ACrit = 9.0"
+        names = []
+        for line in header_lines:
+            if '=' in line:
+                for item in line.split(','):
+                    if '=' in item:
+                        key, value = item.split('=', 1)
+                        meta[key.strip()] = float(value)
+            elif line.startswith('#'):
+                # Cp files of panel_solver.py name the program on a comment line
+                meta['generator'] = line.lstrip('# ').strip()
+            elif line.strip() and not line.startswith('xflr5'):
+                names.append(line.strip())
+        if names:
+            meta['airfoil'] = names[0]
+        if len(names) > 1:
+            meta['polar'] = names[1]
+        meta['analysis'] = 'Panel-Inviscid' if 'generator' in meta else 'XFoil'
+
+    return kind, meta
+
+
+def _column_names(header_line, n_columns):
+    tokens = header_line.split()
+    names = []
+    i = 0
+    while i < len(tokens):
+        pair = tuple(tokens[i:i + 2])
+        if pair in _MERGED_HEADERS:
+            names.append(_MERGED_HEADERS[pair])
+            i += 2
+        else:
+            names.append(tokens[i])
+            i += 1
+    # Newer XFLR5 versions write more values than header names
+    names += [f'col{i}' for i in range(len(names), n_columns)]
+    return names[:n_columns]
+
+
+def read_xflr5(file_path):
+    """
+    Reads any XFLR5 text export in one pass.
+
+    The header is read line by line up to the column header; the numeric block
+    below it goes straight to NumPy's C tokenizer.
+
+    Parameters:
+        file_path (str): Path to the XFLR5 file.
+
+    Returns:
+        XFLR5Data: Kind, metadata and the named data columns.
+    """
+    with open(file_path, 'r') as file:
+        header_lines = []
+        while True:
+            line = file.readline()
+            if not line:
+                raise ValueError(f"No data header found in {file_path}")
+            first = line.split()[:1]
+            if first in (['x'], ['alpha']):
+                header_line = line
+                break
+            header_lines.append(line.rstrip('\n'))
+
+        data_start = file.tell()
+        line = file.readline()
+        # 2D polars underline the header with dashes
+        if not line.lstrip().startswith('-----'):
+            file.seek(data_start)
+
+        try:
+            values = np.loadtxt(file, ndmin=2)
+        except ValueError:
+            # Stray text between the data rows: skip what does not parse
+            file.seek(data_start)
+            values = np.genfromtxt(file, invalid_raise=False, ndmin=2)
+            values = values[~np.isnan(values).any(axis=1)]
+
+    kind, meta = _parse_header(header_lines)
+    columns = _column_names(header_line, values.shape[1])
+    return XFLR5Data(kind, meta, columns, np.asfortranarray(values))
+
+
+def read_xflr5_frame(file_path):
+    """
+    Reads an XFLR5 file into a DataFrame, with the header metadata in df.attrs.
+    """
+    return read_xflr5(file_path).to_frame()